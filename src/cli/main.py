@@ -16,6 +16,17 @@ _sql_translator = None
 _mariadb_formatter = None
 _utils_imported = False
 
+# Optional connection pool settings read from the environment: (variable, MongoDBClient kwarg, type)
+_POOL_ENV_OPTIONS = (
+    ('MONGO_MAX_POOL_SIZE', 'max_pool_size', int),
+    ('MONGO_MIN_POOL_SIZE', 'min_pool_size', int),
+    ('MONGO_MAX_IDLE_TIME_MS', 'max_idle_time_ms', int),
+    ('MONGO_WAIT_QUEUE_TIMEOUT_MS', 'wait_queue_timeout_ms', int),
+    ('MONGO_CONNECT_TIMEOUT_MS', 'connect_timeout_ms', int),
+    ('MONGO_SOCKET_TIMEOUT_MS', 'socket_timeout_ms', int),
+    ('MONGO_COMPRESSORS', 'compressors', str),
+)
+
 def get_mongodb_client():
     """Lazy load MongoDB client"""
     global _mongodb_client
@@ -84,10 +95,18 @@ def main(database, host, port, username, password, execute, batch):
     mongo_db = database or os.getenv('MONGO_DATABASE') or os.getenv('MONGODB_DATABASE')
     mongo_user = username or os.getenv('MONGO_USERNAME') or os.getenv('MONGODB_USERNAME')
     mongo_pass = os.getenv('MONGO_PASSWORD') or os.getenv('MONGODB_PASSWORD')
+    mongo_read_preference = os.getenv('MONGO_READ_PREFERENCE', 'primary')
     
     if password:
         mongo_pass = getpass.getpass("Enter password: ")
     
+    # Only pass pool settings that are set, so unset ones keep the client defaults
+    pool_options = {}
+    for env_name, option, option_type in _POOL_ENV_OPTIONS:
+        env_value = os.getenv(env_name)
+        if env_value:
+            pool_options[option] = option_type(env_value)
+    
     # Database is optional - can be None for initial connection
     
     try:
@@ -98,7 +117,9 @@ def main(database, host, port, username, password, execute, batch):
             port=mongo_port, 
             database=mongo_db,
             username=mongo_user,
-            password=mongo_pass
+            password=mongo_pass,
+            read_preference=mongo_read_preference,
+            **pool_options
         )
         sql_parser = get_sql_parser()
         translator = get_sql_translator()
@@ -7,12 +7,9 @@ from typing import List, Dict, Any, Optional
 from ..modules.where import WhereParser
 from sqlparse.tokens import Keyword, Name, Number, String, Operator, Punctuation, Literal
 from typing import Dict, List, Any, Optional, Union
-import sys
-import os
-sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 from ..modules.joins.join_parser import JoinParser
 from ..modules.joins.join_types import JoinOperation, JoinCondition, JoinType
-from ..modules.subqueries import SubqueryParser
+from ..modules.subqueries import SubqueryParser, SubqueryType
 
 class TokenBasedSQLParser:
     """Parser for SQL statements using proper token-based parsing"""
@@ -75,7 +72,8 @@ class TokenBasedSQLParser:
             'offset': None,
             'joins': [],
             'distinct': False,
-            'subqueries': []
+            'subqueries': [],
+            'has_derived_subquery': False
         }
         
         tokens = list(parsed.flatten())
@@ -84,6 +82,11 @@ class TokenBasedSQLParser:
         original_sql = str(parsed)
         if self.subquery_parser.has_subqueries(original_sql):
             result['subqueries'] = self.subquery_parser.extract_subqueries(original_sql)
+            # Derived tables change how the translator maps aliased columns
+            result['has_derived_subquery'] = any(
+                subq.subquery_type is SubqueryType.DERIVED
+                for subq in result['subqueries']
+            )
         
         i = 0
         
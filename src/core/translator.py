@@ -1,96 +1,515 @@
 """
 SQL to MongoDB Query Language (MQL) translator
 """
-from typing import Dict, List, Any, Optional
+import ast
+import copy
+import json
+import math
+import operator
+from collections import OrderedDict
+from functools import lru_cache
+from sys import intern
+from typing import Dict, List, Any, Optional, Tuple
 from ..functions.function_mapper import FunctionMapper
-import sys
-import os
-sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from ..utils.helpers import sql_like_to_regex, field_reference, SORT_DIRECTIONS
 from ..modules.joins.join_translator import JoinTranslator
 from ..modules.orderby import OrderByParser, OrderByTranslator
 from ..modules.groupby import GroupByParser, GroupByTranslator
 from ..modules.subqueries import SubqueryTranslator
 from ..modules.subqueries.subquery_types import SubqueryType
 
+
+# Operators allowed in constant expressions (SELECT 1+1, ROUND(PI()/2, 3), ...)
+_BINARY_OPERATORS = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+    ast.Mod: operator.mod,
+    ast.BitXor: operator.xor,
+    ast.BitAnd: operator.and_,
+    ast.BitOr: operator.or_,
+    ast.LShift: operator.lshift,
+    ast.RShift: operator.rshift,
+}
+
+_UNARY_OPERATORS = {
+    ast.USub: operator.neg,
+    ast.UAdd: operator.pos,
+    ast.Invert: operator.invert,
+}
+
+_COMPARISON_OPERATORS = {
+    ast.Eq: operator.eq,
+    ast.NotEq: operator.ne,
+    ast.Lt: operator.lt,
+    ast.LtE: operator.le,
+    ast.Gt: operator.gt,
+    ast.GtE: operator.ge,
+}
+
+
+@lru_cache(maxsize=1024)
+def _parse_constant_expression(expr: str) -> ast.AST:
+    """Parse a constant expression once and keep its syntax tree"""
+    return ast.parse(expr.strip(), mode='eval').body
+
+
+def _evaluate_node(node: ast.AST) -> Any:
+    """Evaluate a whitelisted expression node, raising on anything else"""
+    if isinstance(node, ast.Constant):
+        return node.value
+    
+    if isinstance(node, ast.BinOp) and type(node.op) in _BINARY_OPERATORS:
+        return _BINARY_OPERATORS[type(node.op)](_evaluate_node(node.left), _evaluate_node(node.right))
+    
+    if isinstance(node, ast.UnaryOp) and type(node.op) in _UNARY_OPERATORS:
+        return _UNARY_OPERATORS[type(node.op)](_evaluate_node(node.operand))
+    
+    if isinstance(node, ast.Compare) and len(node.ops) == 1 and type(node.ops[0]) in _COMPARISON_OPERATORS:
+        return _COMPARISON_OPERATORS[type(node.ops[0])](_evaluate_node(node.left), _evaluate_node(node.comparators[0]))
+    
+    # PI() is the only function call allowed inside a constant expression
+    if (isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and
+            node.func.id.upper() == 'PI' and not node.args and not node.keywords):
+        return math.pi
+    
+    raise ValueError(f"Unsupported expression: {ast.dump(node)}")
+
+
+def _evaluate_constant_expression(expr: str) -> Any:
+    """Evaluate a constant SQL expression like 1+1 without eval()"""
+    # Plain (ASCII) integers never need the parser
+    if expr.isascii() and expr.isdigit():
+        return int(expr)
+    return _evaluate_node(_parse_constant_expression(expr))
+
+
+@lru_cache(maxsize=4096)
+def _convert_literal(value_str: str) -> Any:
+    """Convert a stripped, unquoted SQL literal to its Python type"""
+    value_upper = value_str.upper()
+    
+    # Handle NULL
+    if value_upper == 'NULL':
+        return None
+    
+    # Handle boolean
+    if value_upper in ('TRUE', 'FALSE'):
+        return value_upper == 'TRUE'
+    
+    # Anything that can't start a number is a plain string. SQL numeric literals
+    # are ASCII, so full-width digits ('１２', '-１２') and names such as 'nan',
+    # 'inf' or 'Infinity' stay strings rather than being coerced by int()/float()
+    first_char = value_str[:1]
+    if not first_char or first_char not in '+-.0123456789' or not value_str.isascii():
+        return value_str
+    
+    # Plain integers and decimals - probe the characters instead of raising
+    digits = value_str[1:] if first_char in '+-' else value_str
+    if digits.isdecimal():
+        return int(value_str)
+    if digits.count('.') == 1 and digits.replace('.', '', 1).isdecimal():
+        return float(value_str)
+    
+    # Rarer spellings (exponents, digit separators) still go through int/float
+    try:
+        if '.' not in value_str:
+            return int(value_str)
+        else:
+            return float(value_str)
+    except ValueError:
+        pass
+    
+    # Return as string for anything else
+    return value_str
+
+
+@lru_cache(maxsize=4096)
+def _split_top_level_args(args_str: str) -> Tuple[str, ...]:
+    """Split a function argument string on commas outside quotes and parentheses"""
+    args = []
+    paren_depth = 0
+    arg_start = 0
+    i = 0
+    length = len(args_str)
+    
+    while i < length:
+        char = args_str[i]
+        if char == "'" or char == '"':
+            # Jump straight to the closing quote - a doubled (escaped) quote
+            # simply re-opens the string on the next iteration
+            close_idx = args_str.find(char, i + 1)
+            if close_idx == -1:
+                break  # Unterminated string runs to the end
+            i = close_idx + 1
+            continue
+        if char == '(':
+            paren_depth += 1
+        elif char == ')':
+            paren_depth -= 1
+        elif char == ',' and paren_depth == 0:
+            # Only split on commas at the top level
+            args.append(args_str[arg_start:i].strip())
+            arg_start = i + 1
+        i += 1
+    
+    # Add the last argument
+    last_arg = args_str[arg_start:].strip()
+    if last_arg:
+        args.append(last_arg)
+    
+    # Cached, so hand back an immutable result
+    return tuple(args)
+
+
+# Two-character comparison operators, checked before their one-character prefixes
+_TWO_CHAR_COMPARISONS = frozenset(['<>', '!=', '>=', '<='])
+
+
+@lru_cache(maxsize=4096)
+def _split_comparison(condition: str) -> Optional[Tuple[str, str, str]]:
+    """Split "left <op> right" at the first comparison operator outside quotes"""
+    i = 0
+    length = len(condition)
+    
+    while i < length:
+        char = condition[i]
+        if char in '\'"`':
+            # Jump over the quoted span in one step
+            end = condition.find(char, i + 1)
+            if end == -1:
+                return None
+            i = end + 1
+            continue
+        
+        if char in '=<>!':
+            comparison_op = condition[i:i + 2]
+            if comparison_op not in _TWO_CHAR_COMPARISONS:
+                if char == '!':
+                    return None
+                comparison_op = char
+            left = condition[:i].strip()
+            right = condition[i + len(comparison_op):].strip()
+            if not left or not right:
+                return None
+            return left, comparison_op, right
+        
+        i += 1
+    
+    return None
+
+
+@lru_cache(maxsize=4096)
+def _parse_function_call(func_str: str) -> Optional[Tuple[str, Tuple[str, ...]]]:
+    """Parse a function call string like 'NOW()' or 'YEAR('2024-12-25')' into components"""
+    if not func_str or not func_str.strip():
+        return None
+    
+    func_str = func_str.strip()
+    
+    # Must have parentheses
+    if not ('(' in func_str and func_str.endswith(')')):
+        return None
+    
+    # Extract function name and arguments
+    paren_idx = func_str.find('(')
+    func_name = func_str[:paren_idx].strip().upper()
+    
+    # Extract arguments (everything between parentheses)
+    args_str = func_str[paren_idx + 1:-1].strip()
+    
+    args = _split_top_level_args(args_str) if args_str else ()
+    
+    return func_name, args
+
+
+# Translation table that deletes every mathematical operator
+_MATH_OPERATOR_TABLE = str.maketrans('', '', '+-*/%^')
+
+
+@lru_cache(maxsize=4096)
+def _contains_expression(arg_str: str) -> bool:
+    """Check if the argument string contains function calls or mathematical expressions"""
+    # Check for function calls (contains parentheses)
+    if '(' in arg_str and ')' in arg_str:
+        return True
+    
+    # Check for mathematical operators, but exclude leading negative signs
+    # A leading negative sign alone doesn't make it an expression
+    arg_stripped = arg_str.strip()
+    if arg_stripped.startswith('-'):
+        # Check if it's just a negative number
+        remaining = arg_stripped[1:]
+        if remaining.replace('.', '').isdigit():
+            return False  # It's just a negative number
+        # Check for operators after the negative sign
+        return len(remaining.translate(_MATH_OPERATOR_TABLE)) != len(remaining)
+    
+    # Check for mathematical operators - deleting them in one pass changes the length
+    return len(arg_str.translate(_MATH_OPERATOR_TABLE)) != len(arg_str)
+
+
+# Argument expressions common enough to skip parsing altogether
+_CONSTANT_ARGUMENT_EXPRESSIONS = {
+    'PI()': math.pi,
+    'PI()/2': math.pi / 2,
+    'PI()*2': math.pi * 2,
+}
+
+
+@lru_cache(maxsize=4096)
+def _evaluate_argument_expression(arg_str: str) -> Any:
+    """Evaluate a mathematical expression or function call in an argument"""
+    # Common PI() patterns are answered straight from the constants table
+    constant_value = _CONSTANT_ARGUMENT_EXPRESSIONS.get(arg_str)
+    if constant_value is not None:
+        return constant_value
+    
+    # Handle PI() function calls
+    if 'PI()' in arg_str:
+        try:
+            return _evaluate_constant_expression(arg_str)
+        except Exception:
+            pass
+    
+    # For more complex expressions, we could parse them properly
+    # but for now, handle the most common cases
+    if '/' in arg_str:
+        parts = arg_str.split('/')
+        if len(parts) == 2:
+            # float() accepts every numeric spelling (including exponents like 1e2);
+            # non-numeric operands and a zero divisor fall through to the raw string
+            try:
+                left = float(parts[0].strip())
+                right = float(parts[1].strip())
+            except ValueError:
+                pass
+            else:
+                if right:
+                    return left / right
+    
+    # If all else fails, return the original string
+    return arg_str
+
+
+
+def _is_quoted(text: str) -> bool:
+    """Check if text is wrapped in matching single or double quotes"""
+    return len(text) >= 2 and text[0] == text[-1] and text[0] in ("'", '"')
+
+
+# Document path prefix for each table alias in a derived-table query: the main
+# table's fields stay at the root, the derived table's are under derived_orders
+_DERIVED_ALIAS_PREFIXES = {
+    'c': '',
+    'o': 'derived_orders.',
+}
+
+
+@lru_cache(maxsize=512)
+def _build_subquery_projection(columns_key: Tuple[Any, ...], has_derived_subquery: bool) -> Tuple[Tuple[str, str], ...]:
+    """Build the $project fields for a subquery SELECT list as (field, expression) pairs"""
+    # Select all fields - don't add specific projection
+    if '*' in columns_key:
+        return ()
+    
+    # Without derived tables every column maps straight to its own field
+    if not has_derived_subquery:
+        projection_stage = {
+            col_name: field_reference(col_name)
+            for col_name in (col if type(col) is str else col[1] for col in columns_key if col is not None)
+        }
+        return tuple(projection_stage.items())
+    
+    projection_stage = {}
+    
+    for col in columns_key:
+        if type(col) is str:
+            # One partition both detects and splits an "alias.field" reference
+            alias, dot, field = col.partition('.')
+            if dot:
+                # Handle aliased column references for DERIVED subqueries
+                # e.g., "c.customerName" -> "customerName", "o.total_orders" -> "total_orders"
+                prefix = _DERIVED_ALIAS_PREFIXES.get(alias)
+                if prefix is not None:
+                    # Known alias - map to its document path with clean name
+                    projection_stage[field] = field_reference(prefix + field)
+                else:
+                    # Unknown alias - use field name as-is
+                    projection_stage[field] = field_reference(col)
+            else:
+                # Normal column mapping
+                projection_stage[col] = field_reference(col)
+        elif col is not None:
+            # ('column', name) entries come from dict columns
+            col_name = col[1]
+            projection_stage[col_name] = field_reference(col_name)
+    
+    # Cached, so hand back an immutable result
+    return tuple(projection_stage.items())
+
+
+# Conditional functions that need their quoted string arguments kept intact
+_PRESERVE_QUOTE_FUNCS = frozenset(['IF', 'CASE', 'COALESCE', 'NULLIF'])
+
+
+@lru_cache(maxsize=4096)
+def _parse_and_coerce_args(args_str: str, preserve_quotes: bool = False) -> Tuple[Any, ...]:
+    """Split a function argument string and convert each argument for better type handling"""
+    converted_args = []
+    for arg in _split_top_level_args(args_str):
+        # Handle quoted strings based on function type
+        if _is_quoted(arg):
+            if preserve_quotes:
+                # Keep as quoted string for conditional functions
+                converted_args.append(arg)
+                continue
+            else:
+                # Remove quotes for other functions (string, math, etc.)
+                arg = arg[1:-1]
+        
+        # Check if it's NULL literal
+        if arg.upper() == 'NULL':
+            converted_args.append(None)
+            continue
+        
+        # Check if the argument contains function calls or mathematical expressions
+        if _contains_expression(arg):
+            # Evaluate the expression
+            try:
+                converted_args.append(_evaluate_argument_expression(arg))
+                continue
+            except Exception:
+                # If evaluation fails, continue with original logic
+                pass
+        
+        # Try to convert to number if it looks like a number
+        try:
+            # Check if it's an integer
+            if '.' not in arg and arg.lstrip('-').isdigit():
+                converted_args.append(int(arg))
+            # Check if it's a float
+            else:
+                converted_args.append(float(arg))
+        except ValueError:
+            # If conversion fails, keep as string
+            converted_args.append(arg)
+    
+    return tuple(converted_args)
+
 class MongoSQLTranslator:
     """Translates parsed SQL to MongoDB Query Language"""
     
     def __init__(self):
         self.function_mapper = FunctionMapper()
+        self.aggregate_function_names = frozenset(
+            self.function_mapper.aggregate_mapper.get_supported_functions()
+        )
         self.join_translator = JoinTranslator()
         self.orderby_parser = OrderByParser()
         self.orderby_translator = OrderByTranslator()
         self.groupby_parser = GroupByParser()
         self.groupby_translator = GroupByTranslator()
         self.subquery_translator = SubqueryTranslator()
+        self.statement_map = {
+            'SELECT': self._translate_select,
+            'INSERT': self._translate_insert,
+            'UPDATE': self._translate_update,
+            'DELETE': self._translate_delete,
+            'SHOW': self._translate_show,
+            'USE': self._translate_use
+        }
+        self.comparison_operator_map = {
+            '!=': '$ne',
+            '<>': '$ne',
+            '>': '$gt',
+            '>=': '$gte',
+            '<': '$lt',
+            '<=': '$lte'
+        }
+        # Translated plans keyed by the parsed statement, oldest first
+        self.plan_cache = OrderedDict()
+        self.plan_cache_size = 256
+        self.condition_map = {
+            'BETWEEN': self._translate_between_condition,
+            'LIKE': self._translate_like_condition,
+            'IN': self._translate_in_condition
+        }
+        # Mapped function expressions keyed by name and typed arguments, oldest first
+        self.function_mapping_cache = OrderedDict()
+        self.function_mapping_cache_size = 1024
+        # ORDER BY parsed out of raw SQL text, keyed by that text
+        self.parse_sql_sort_pairs = lru_cache(maxsize=1024)(self._parse_sql_sort_pairs)
+        # SQL datetime keywords (no parentheses) - these resolve $$NOW on the server
+        datetime_mapper = self.function_mapper.datetime_mapper
+        self.sql_datetime_keywords = {
+            'CURRENT_DATE': datetime_mapper._map_curdate([]),
+            'CURRENT_TIME': datetime_mapper._map_curtime([]),
+            'CURRENT_TIMESTAMP': datetime_mapper._map_now([]),
+        }
     
     def _is_aggregate_function(self, function_name: str) -> bool:
-        """Check if a function is an aggregate function using the function mapper"""
+        """Check if a function is an aggregate function using the function mapper's names"""
         if not function_name:
             return False
-        return self.function_mapper.is_aggregate_function(function_name)
+        return function_name.upper() in self.aggregate_function_names
     
     def translate(self, parsed_sql: Dict[str, Any]) -> Dict[str, Any]:
         """Translate parsed SQL to MQL"""
         sql_type = parsed_sql.get('type')
         
-        if sql_type == 'SELECT':
-            return self._translate_select(parsed_sql)
-        elif sql_type == 'INSERT':
-            return self._translate_insert(parsed_sql)
-        elif sql_type == 'UPDATE':
-            return self._translate_update(parsed_sql)
-        elif sql_type == 'DELETE':
-            return self._translate_delete(parsed_sql)
-        elif sql_type == 'SHOW':
-            return self._translate_show(parsed_sql)
-        elif sql_type == 'USE':
-            return self._translate_use(parsed_sql)
-        else:
+        handler = self.statement_map.get(sql_type)
+        if not handler:
             raise Exception(f"Unsupported SQL type: {sql_type}")
+        
+        # Subquery objects are translated statefully - always translate them fresh
+        if parsed_sql.get('subqueries'):
+            return handler(parsed_sql)
+        
+        cache_key = self._get_plan_cache_key(parsed_sql)
+        cached_mql = self.plan_cache.get(cache_key)
+        if cached_mql is not None:
+            self.plan_cache.move_to_end(cache_key)
+            return copy.deepcopy(cached_mql)
+        
+        mql = handler(parsed_sql)
+        
+        # Store a private copy so callers can't mutate the cached plan
+        self.plan_cache[cache_key] = copy.deepcopy(mql)
+        if len(self.plan_cache) > self.plan_cache_size:
+            self.plan_cache.popitem(last=False)
+        
+        return mql
+    
+    def _get_plan_cache_key(self, parsed_sql: Dict[str, Any]) -> str:
+        """Build a canonical cache key from the parsed SQL structure"""
+        # JOIN operations are dataclasses, whose repr lists every field
+        return json.dumps(parsed_sql, sort_keys=True, default=repr)
     
     def _translate_select(self, parsed_sql: Dict[str, Any]) -> Dict[str, Any]:
         """Translate SELECT statement to MongoDB find()"""
-        
-        # Check if this query has JOINs
-        if parsed_sql.get('joins'):
-            return self.join_translator.translate_join_query(parsed_sql)
-        
-        # Handle DISTINCT queries
-        if parsed_sql.get('distinct'):
-            # For DISTINCT, we need to use MongoDB's distinct() operation
-            columns = parsed_sql.get('columns', [])
-            if len(columns) == 1 and columns[0] != '*':
-                # Single column DISTINCT
-                field_name = columns[0] if isinstance(columns[0], str) else columns[0].get('column', columns[0])
-                
-                # Check if we have LIMIT - if so, use aggregation pipeline
-                if parsed_sql.get('limit'):
-                    return self._translate_distinct_with_limit(parsed_sql, field_name)
-                
-                mql = {
-                    'operation': 'distinct',
-                    'collection': parsed_sql.get('from'),
-                    'field': field_name
-                }
-                
-                # Handle WHERE clause for distinct
-                if parsed_sql.get('where'):
-                    mql['filter'] = self._translate_where(parsed_sql['where'])
-                    
-                return mql
-            else:
-                # Multiple column DISTINCT - use aggregation pipeline
-                return self._translate_distinct_multiple(parsed_sql)
+        from_table = parsed_sql.get('from')
+        
+        # JOIN, DISTINCT and no-FROM queries are the uncommon shapes - route them
+        # behind one combined check so plain SELECTs fall straight through
+        if parsed_sql.get('joins') or parsed_sql.get('distinct') or not from_table:
+            if parsed_sql.get('joins'):
+                return self.join_translator.translate_join_query(parsed_sql)
+            if parsed_sql.get('distinct'):
+                return self._translate_distinct(parsed_sql)
+            # Queries without FROM clause (like SELECT 1+1, SELECT NOW())
+            return self._handle_no_table_query(parsed_sql)
         
         # Regular SELECT handling
-        
-        # Check for queries without FROM clause (like SELECT 1+1, SELECT NOW())
-        if not parsed_sql.get('from'):
-            return self._handle_no_table_query(parsed_sql)
+        columns = parsed_sql.get('columns')
+        where = parsed_sql.get('where')
+        order_by = parsed_sql.get('order_by')
+        original_sql = parsed_sql.get('original_sql')
+        limit = parsed_sql.get('limit')
         
         # Check for aggregate functions
-        if parsed_sql.get('columns'):
+        if columns:
             aggregate_result = self._handle_aggregate_functions(parsed_sql)
             if aggregate_result:
                 return aggregate_result
@@ -101,54 +520,47 @@ class MongoSQLTranslator:
         
         mql = {
             'operation': 'find',
-            'collection': parsed_sql.get('from')
+            'collection': from_table
         }
         
         # Handle WHERE clause
-        if parsed_sql.get('where'):
-            mql['filter'] = self._translate_where(parsed_sql['where'])
+        if where:
+            mql['filter'] = self._translate_where(where)
         
         # Handle column selection (projection)
-        if parsed_sql.get('columns') and parsed_sql['columns'] != ['*']:
+        if columns and columns != ['*']:
             projection = {}
             has_id_column = False
             query_columns = []  # Track the order of columns in the query
             
-            for col in parsed_sql['columns']:
-                if isinstance(col, dict) and 'column' in col:
-                    # Handle aliased columns
-                    col_name = col['column']
-                    projection[col_name] = 1
-                    query_columns.append(col_name)
-                    if col_name == '_id':
-                        has_id_column = True
-                elif isinstance(col, dict) and 'function' in col:
-                    # Handle function columns - check if it's an aggregate function first
-                    func_name = col.get('function')
-                    if self._is_aggregate_function(func_name):
-                        # This is an aggregate function, let the aggregate handler deal with it
-                        aggregate_result = self._handle_aggregate_functions(parsed_sql)
-                        if aggregate_result:
-                            return aggregate_result
+            for col in columns:
+                # Resolve each column to its projected field name in one pass
+                if type(col) is dict:
+                    if 'column' in col:
+                        # Handle aliased columns
+                        col_name = col['column']
+                    elif 'function' in col:
+                        # Handle function columns - aggregate functions were already
+                        # offered to _handle_aggregate_functions above
+                        if not self._is_aggregate_function(col['function']):
+                            # Non-aggregate function with FROM clause - use aggregation pipeline
+                            return self._handle_function_with_from(parsed_sql)
+                        continue
                     else:
-                        # Non-aggregate function with FROM clause - use aggregation pipeline
-                        return self._handle_function_with_from(parsed_sql)
-                else:
+                        continue
+                elif type(col) is str:
                     # Handle qualified column names (e.g., "c.customerName")
-                    col_name = col
-                    if isinstance(col, str) and '.' in col:
-                        # Extract just the column name from table.column format
-                        parts = col.split('.', 1)
-                        if len(parts) == 2:
-                            table_alias, col_name = parts
-                            # For now, just use the column name
-                            # TODO: Validate table alias matches the FROM clause
-                    
-                    if isinstance(col_name, str):  # Ensure it's a string before using as dict key
-                        projection[col_name] = 1
-                        query_columns.append(col_name)
-                        if col_name == '_id':
-                            has_id_column = True
+                    # For now, just use the column name
+                    # TODO: Validate table alias matches the FROM clause
+                    _, dot, field = col.partition('.')
+                    col_name = field if dot else col
+                else:
+                    continue
+                
+                projection[col_name] = 1
+                query_columns.append(col_name)
+                if col_name == '_id':
+                    has_id_column = True
             
             # Exclude _id if it wasn't explicitly requested
             if not has_id_column:
@@ -157,40 +569,77 @@ class MongoSQLTranslator:
             mql['projection'] = projection
             mql['query_columns'] = query_columns  # Preserve query column order
         
-        # Handle ORDER BY using modular parser
-        if parsed_sql.get('order_by') or parsed_sql.get('original_sql'):
-            # First try to use parsed order_by if available
-            if parsed_sql.get('order_by'):
-                sort_spec = []
-                for order_item in parsed_sql['order_by']:
-                    direction = 1 if order_item['direction'] == 'ASC' else -1
-                    sort_spec.append((order_item['field'], direction))
-                mql['sort'] = sort_spec
-            else:
-                # Try to parse ORDER BY from original SQL using our modular parser
-                original_sql = parsed_sql.get('original_sql', '')
-                if original_sql:
-                    order_by_clause = self.orderby_parser.parse_order_by(original_sql)
-                    if order_by_clause and not order_by_clause.is_empty():
-                        # Convert to MongoDB sort specification
-                        sort_stages = self.orderby_translator.get_sort_pipeline_stage(order_by_clause)
-                        if sort_stages:
-                            # Extract sort specification from pipeline stage
-                            sort_spec = []
-                            for field, direction in sort_stages[0]['$sort'].items():
-                                sort_spec.append((field, direction))
-                            mql['sort'] = sort_spec
+        # Handle ORDER BY - find() takes the sort as (field, direction) pairs
+        sort_spec = self._get_sort_spec(order_by, original_sql)
+        if sort_spec:
+            mql['sort'] = list(sort_spec.items())
         
         # Handle LIMIT
-        if parsed_sql.get('limit'):
-            limit_info = parsed_sql['limit']
-            if 'count' in limit_info:
-                mql['limit'] = limit_info['count']
-            if 'offset' in limit_info:
-                mql['skip'] = limit_info['offset']
+        if limit:
+            if 'count' in limit:
+                mql['limit'] = limit['count']
+            if 'offset' in limit:
+                mql['skip'] = limit['offset']
         
         return mql
     
+    def _get_sort_spec(self, order_by: Optional[List[Dict[str, Any]]], original_sql: Optional[str]) -> Dict[str, int]:
+        """Resolve ORDER BY into a MongoDB sort specification (empty if none)"""
+        # First try to use parsed order_by if available
+        if order_by:
+            return {
+                order_item['field']: SORT_DIRECTIONS.get(order_item['direction'], -1)
+                for order_item in order_by
+            }
+        
+        # Otherwise parse ORDER BY from original SQL using our modular parser
+        if original_sql:
+            return dict(self.parse_sql_sort_pairs(original_sql))
+        
+        return {}
+    
+    def _parse_sql_sort_pairs(self, original_sql: str) -> Tuple[Tuple[str, int], ...]:
+        """Parse ORDER BY out of raw SQL into (field, direction) pairs"""
+        # Without the keyword there is nothing for the token parser to find
+        if 'ORDER' not in original_sql.upper():
+            return ()
+        
+        order_by_clause = self.orderby_parser.parse_order_by(original_sql)
+        if order_by_clause and not order_by_clause.is_empty():
+            sort_stages = self.orderby_translator.get_sort_pipeline_stage(order_by_clause)
+            if sort_stages:
+                # Cached, so hand back an immutable result
+                return tuple(sort_stages[0]['$sort'].items())
+        
+        return ()
+    
+    def _translate_distinct(self, parsed_sql: Dict[str, Any]) -> Dict[str, Any]:
+        """Translate SELECT DISTINCT to MongoDB distinct()"""
+        columns = parsed_sql.get('columns') or []
+        
+        if len(columns) == 1 and columns[0] != '*':
+            # Single column DISTINCT
+            field_name = columns[0] if isinstance(columns[0], str) else columns[0].get('column', columns[0])
+            
+            # Check if we have LIMIT - if so, use aggregation pipeline
+            if parsed_sql.get('limit'):
+                return self._translate_distinct_with_limit(parsed_sql, field_name)
+            
+            mql = {
+                'operation': 'distinct',
+                'collection': parsed_sql.get('from'),
+                'field': field_name
+            }
+            
+            # Handle WHERE clause for distinct
+            if parsed_sql.get('where'):
+                mql['filter'] = self._translate_where(parsed_sql['where'])
+                
+            return mql
+        else:
+            # Multiple column DISTINCT - use aggregation pipeline
+            return self._translate_distinct_multiple(parsed_sql)
+    
     def _translate_distinct_multiple(self, parsed_sql: Dict[str, Any]) -> Dict[str, Any]:
         """Translate multi-column DISTINCT using aggregation pipeline"""
         # This is more complex and would require aggregation pipeline
@@ -199,12 +648,16 @@ class MongoSQLTranslator:
     
     def _translate_distinct_with_limit(self, parsed_sql: Dict[str, Any], field_name: str) -> Dict[str, Any]:
         """Translate DISTINCT with LIMIT using aggregation pipeline"""
+        where = parsed_sql.get('where')
+        order_by = parsed_sql.get('order_by')
+        original_sql = parsed_sql.get('original_sql')
+        limit = parsed_sql.get('limit')
         pipeline = []
         
         # Add match stage if WHERE clause exists
-        if parsed_sql.get('where'):
+        if where:
             pipeline.append({
-                '$match': self._translate_where(parsed_sql['where'])
+                '$match': self._translate_where(where)
             })
         
         # Group by the field to get distinct values
@@ -215,29 +668,15 @@ class MongoSQLTranslator:
             }
         })
         
-        # Add ORDER BY using modular parser
-        if parsed_sql.get('order_by') or parsed_sql.get('original_sql'):
-            if parsed_sql.get('order_by'):
-                # Use parsed order_by if available
-                sort_spec = {}
-                for order_item in parsed_sql['order_by']:
-                    direction = 1 if order_item['direction'] == 'ASC' else -1
-                    sort_spec[order_item['field']] = direction
-                pipeline.append({'$sort': sort_spec})
-            else:
-                # Try to parse ORDER BY from original SQL
-                original_sql = parsed_sql.get('original_sql', '')
-                if original_sql:
-                    order_by_clause = self.orderby_parser.parse_order_by(original_sql)
-                    if order_by_clause and not order_by_clause.is_empty():
-                        sort_stages = self.orderby_translator.get_sort_pipeline_stage(order_by_clause)
-                        if sort_stages:
-                            pipeline.extend(sort_stages)
+        # Add ORDER BY
+        sort_spec = self._get_sort_spec(order_by, original_sql)
+        if sort_spec:
+            pipeline.append({'$sort': sort_spec})
         
         # Add limit if specified
-        if parsed_sql.get('limit') and 'count' in parsed_sql['limit']:
+        if limit and 'count' in limit:
             pipeline.append({
-                '$limit': parsed_sql['limit']['count']
+                '$limit': limit['count']
             })
         
         # Project to clean up the result
@@ -263,18 +702,17 @@ class MongoSQLTranslator:
         if not table:
             raise Exception("No table specified in INSERT")
         
+        convert_value = self._convert_value
+        
         if len(values) == 1:
             # Single document insert
-            document = {}
-            if columns:
-                # Columns specified
-                for i, col in enumerate(columns):
-                    if i < len(values[0]):
-                        document[col] = self._convert_value(values[0][i])
-            else:
+            if not columns:
                 # No columns specified - this would need schema information
                 raise Exception("INSERT without column specification requires schema information")
             
+            # zip stops at the shorter of columns/values
+            document = dict(zip(columns, map(convert_value, values[0])))
+            
             return {
                 'operation': 'insert_one',
                 'collection': table,
@@ -282,14 +720,7 @@ class MongoSQLTranslator:
             }
         else:
             # Multiple document insert
-            documents = []
-            for value_set in values:
-                document = {}
-                if columns:
-                    for i, col in enumerate(columns):
-                        if i < len(value_set):
-                            document[col] = self._convert_value(value_set[i])
-                documents.append(document)
+            documents = [dict(zip(columns, map(convert_value, value_set))) for value_set in values]
             
             return {
                 'operation': 'insert_many',
@@ -366,29 +797,38 @@ class MongoSQLTranslator:
         if not field or not operator:
             return {}
         
-        # Skip conditions that involve subqueries - they will be handled by subquery translator
-        if value and isinstance(value, str) and value.strip().startswith('(SELECT'):
-            return {}  # Return empty filter, let subquery translator handle this
-        
-        # Skip EXISTS subqueries - they will be handled by subquery translator
-        if field and isinstance(field, str) and field.strip().startswith('EXISTS'):
-            return {}  # Return empty filter, let subquery translator handle this
-        
-        # Skip IN conditions that contain subquery strings in array
-        if value and isinstance(value, list):
-            for item in value:
-                if isinstance(item, str) and ('SELECT' in item.upper() or '(SELECT' in item):
-                    return {}  # Return empty filter, let subquery translator handle this
-            
-        # Also skip IN conditions with arrays that contain subqueries
-        if operator and operator.upper() == 'IN' and value and isinstance(value, list):
-            # Check if any value in the IN list is a subquery
-            for v in value:
-                if isinstance(v, str) and v.strip().startswith('(SELECT'):
-                    return {}  # Skip this condition
+        # Skip conditions that involve subqueries - they will be handled by the subquery translator.
+        # Only parenthesised scalar subqueries, EXISTS fields and IN lists whose first item
+        # is a SELECT qualify, so plain literals such as 'Select Plus' are still filtered on.
+        # The parser splits IN-subquery text on commas, so the list may have several items
+        if self._is_scalar_subquery_text(value) or self._is_exists_field(field):
+            return {}
+        if isinstance(value, list) and value and self._starts_with_keyword(value[0], 'SELECT'):
+            return {}
         
         return self._translate_single_condition(field, operator, value)
     
+    def _starts_with_keyword(self, text: Any, keyword: str) -> bool:
+        """Check whether text starts with the given SQL keyword as a whole word"""
+        if not isinstance(text, str):
+            return False
+        text = text.lstrip()
+        # Only the leading keyword matters, so upper-case just that slice
+        next_char = text[len(keyword):len(keyword) + 1]
+        return (text[:len(keyword)].upper() == keyword and
+                not (next_char.isalnum() or next_char == '_'))
+    
+    def _is_scalar_subquery_text(self, value: Any) -> bool:
+        """Check whether a WHERE value is a parenthesised subquery, e.g. '(SELECT MAX(x) FROM t)'"""
+        if not isinstance(value, str):
+            return False
+        value = value.lstrip()
+        return value[:1] == '(' and self._starts_with_keyword(value[1:], 'SELECT')
+    
+    def _is_exists_field(self, field: Any) -> bool:
+        """Check whether a WHERE field is an EXISTS subquery"""
+        return self._starts_with_keyword(field, 'EXISTS')
+    
     def _translate_compound_where(self, where_clause: Dict[str, Any]) -> Dict[str, Any]:
         """Translate compound WHERE clause with AND/OR operators"""
         conditions = where_clause.get('conditions', [])
@@ -397,17 +837,17 @@ class MongoSQLTranslator:
         if not conditions:
             return {}
         
-        # Translate each condition
-        translated_conditions = []
-        for condition in conditions:
-            field = condition.get('field')
-            operator = condition.get('operator')
-            value = condition.get('value')
-            
-            if field and operator:
-                mongo_condition = self._translate_single_condition(field, operator, value)
-                if mongo_condition:
-                    translated_conditions.append(mongo_condition)
+        # Translate each condition in one pass, dropping the empty ones
+        translate_condition = self._translate_single_condition
+        translated_conditions = [
+            mongo_condition
+            for mongo_condition in (
+                translate_condition(condition['field'], condition['operator'], condition.get('value'))
+                for condition in conditions
+                if condition.get('field') and condition.get('operator')
+            )
+            if mongo_condition
+        ]
         
         if not translated_conditions:
             return {}
@@ -416,99 +856,91 @@ class MongoSQLTranslator:
         if len(translated_conditions) == 1:
             return translated_conditions[0]
         
-        # Handle multiple conditions with operators
+        # Handle multiple conditions with operators - default to AND
         if not operators:
-            # Default to AND if no operators specified
-            operators = ['AND'] * (len(translated_conditions) - 1)
-        
-        # Check if all operators are the same
-        unique_operators = set(operators)
+            return {'$and': translated_conditions}
         
-        if len(unique_operators) == 1:
-            # All operators are the same
-            op = operators[0]
-            if op == 'AND':
+        # All operators the same - no set needed to check that
+        first_operator = operators[0]
+        if operators.count(first_operator) == len(operators):
+            if first_operator == 'AND':
                 # MongoDB $and
                 return {'$and': translated_conditions}
-            elif op == 'OR':
+            elif first_operator == 'OR':
                 # MongoDB $or
                 return {'$or': translated_conditions}
-        else:
-            # Mixed operators - need to handle precedence
-            # For now, use $and as default and nest appropriately
-            return {'$and': translated_conditions}
+            return {}
         
-        return {}
+        # Mixed operators - need to handle precedence
+        # For now, use $and as default and nest appropriately
+        return {'$and': translated_conditions}
     
     def _translate_single_condition(self, field: str, operator: str, value: Any) -> Dict[str, Any]:
-        """Translate a single WHERE condition"""
-        
-        # Map SQL operators to MongoDB operators
-        if operator == '=':
-            converted_value = self._convert_value(value)
-            return {field: converted_value}
-        elif operator in ['!=', '<>']:
-            converted_value = self._convert_value(value)
-            return {field: {'$ne': converted_value}}
-        elif operator == '>':
-            converted_value = self._convert_value(value)
-            return {field: {'$gt': converted_value}}
-        elif operator == '>=':
-            converted_value = self._convert_value(value)
-            return {field: {'$gte': converted_value}}
-        elif operator == '<':
-            converted_value = self._convert_value(value)
-            return {field: {'$lt': converted_value}}
-        elif operator == '<=':
-            converted_value = self._convert_value(value)
-            return {field: {'$lte': converted_value}}
-        elif operator.upper() == 'BETWEEN':
-            # Handle BETWEEN operator
-            if isinstance(value, list) and len(value) == 2:
-                val1 = self._convert_value(value[0])
-                val2 = self._convert_value(value[1])
-                return {field: {'$gte': val1, '$lte': val2}}
-            return {}
-        elif operator.upper() == 'LIKE':
-            # Convert SQL LIKE to MongoDB regex
-            converted_value = self._convert_value(value)
-            regex_pattern = str(converted_value).replace('%', '.*').replace('_', '.')
-            return {field: {'$regex': regex_pattern, '$options': 'i'}}
-        elif operator.upper() == 'IN':
-            # Handle IN operator
-            if isinstance(value, list):
-                return {field: {'$in': [self._convert_value(v) for v in value]}}
-            elif isinstance(value, str):
-                # Parse the IN list if it's still a string
-                in_values = [v.strip().strip("'\"") for v in value.strip('()').split(',')]
-                return {field: {'$in': [self._convert_value(v) for v in in_values]}}
-            return {field: {'$in': value}}
-        else:
-            # Fallback
-            converted_value = self._convert_value(value)
-            return {field: converted_value}
+        """Translate a single WHERE condition (operator is upper-cased by WhereParser)"""
+        # BETWEEN, LIKE and IN build their own value shapes
+        condition_handler = self.condition_map.get(operator)
+        if condition_handler:
+            return condition_handler(field, value)
+        
+        # Map SQL comparison operators to MongoDB operators
+        converted_value = self._convert_value(value)
+        mongo_operator = self.comparison_operator_map.get(operator)
+        if mongo_operator:
+            return {field: {mongo_operator: converted_value}}
+        
+        # Equality and fallback
+        return {field: converted_value}
+    
+    def _translate_between_condition(self, field: str, value: Any) -> Dict[str, Any]:
+        """Translate BETWEEN to an inclusive $gte/$lte range"""
+        if isinstance(value, list) and len(value) == 2:
+            val1 = self._convert_value(value[0])
+            val2 = self._convert_value(value[1])
+            return {field: {'$gte': val1, '$lte': val2}}
+        return {}
+    
+    def _translate_like_condition(self, field: str, value: Any) -> Dict[str, Any]:
+        """Convert SQL LIKE to MongoDB regex"""
+        converted_value = self._convert_value(value)
+        regex_pattern = sql_like_to_regex(str(converted_value))
+        return {field: {'$regex': regex_pattern, '$options': 'i'}}
+    
+    def _translate_in_condition(self, field: str, value: Any) -> Dict[str, Any]:
+        """Translate IN list to MongoDB $in"""
+        if isinstance(value, list):
+            # Plain strings go straight to the cached literal converter
+            convert_value = self._convert_value
+            return {field: {'$in': [
+                _convert_literal(v.strip()) if type(v) is str else convert_value(v)
+                for v in value
+            ]}}
+        elif isinstance(value, str):
+            # Parse the IN list if it's still a string
+            return {field: {'$in': [
+                _convert_literal(v.strip().strip("'\"").strip())
+                for v in value.strip('()').split(',')
+            ]}}
+        return {field: {'$in': value}}
     
     def _convert_value(self, value) -> Any:
         """Convert SQL value to appropriate Python/MongoDB type"""
-        if value is None:
-            return None
+        # Exact type checks - parser output is never a str/dict subclass
+        value_type = type(value)
+        
+        # Handle legacy string values
+        if value_type is str:
+            return _convert_literal(value.strip())
         
         # Handle new value structure with quote information
-        if isinstance(value, dict) and 'value' in value:
-            actual_value = value['value']
-            was_quoted = value.get('quoted', False)
-            
+        if value_type is dict and 'value' in value:
             # If value was quoted, treat as string
-            if was_quoted:
-                return actual_value
+            if value.get('quoted', False):
+                return value['value']
             
             # If not quoted, try to convert to appropriate type
-            return self._convert_unquoted_value(actual_value)
-        
-        # Handle legacy string values
-        if isinstance(value, str):
-            return self._convert_unquoted_value(value)
+            return self._convert_unquoted_value(value['value'])
         
+        # None and already-typed values pass through
         return value
     
     def _convert_unquoted_value(self, value_str: str) -> Any:
@@ -516,28 +948,7 @@ class MongoSQLTranslator:
         if value_str is None:
             return None
         
-        value_str = str(value_str).strip()
-        
-        # Handle NULL
-        if value_str.upper() == 'NULL':
-            return None
-        
-        # Handle boolean
-        if value_str.upper() in ['TRUE', 'FALSE']:
-            return value_str.upper() == 'TRUE'
-        
-        # Handle numbers
-        try:
-            # Try integer first
-            if '.' not in value_str:
-                return int(value_str)
-            else:
-                return float(value_str)
-        except ValueError:
-            pass
-        
-        # Return as string for anything else
-        return value_str
+        return _convert_literal(str(value_str).strip())
     
     def translate_function(self, function_name: str, args: List[Any]) -> Dict[str, Any]:
         """Translate SQL function to MongoDB equivalent"""
@@ -582,7 +993,7 @@ class MongoSQLTranslator:
         regular_columns = []
         
         for col in columns:
-            if isinstance(col, dict) and 'function' in col:
+            if type(col) is dict and 'function' in col:
                 aggregate_functions.append(col)
             else:
                 regular_columns.append(col)
@@ -635,62 +1046,41 @@ class MongoSQLTranslator:
         if field == '*':
             raise Exception(f"{func_name} requires a specific field, not *")
         
+        where = parsed_sql.get('where')
+        order_by = parsed_sql.get('order_by')
+        original_sql = parsed_sql.get('original_sql')
+        
         # Build aggregation pipeline
         pipeline = []
         
         # Add match stage if WHERE clause exists
-        if parsed_sql.get('where'):
-            match_filter = self._translate_where(parsed_sql['where'])
+        if where:
+            match_filter = self._translate_where(where)
             if match_filter:
                 pipeline.append({'$match': match_filter})
         
-        # Add project stage to convert field to number
+        # Convert the field to a number inside the accumulator so no
+        # separate $project pass over every document is needed
+        numeric_field = {'$cond': [
+            {'$isNumber': f'${field}'},
+            f'${field}',
+            {'$convert': {'input': f'${field}', 'to': 'double', 'onError': 0}}
+        ]}
+        
+        # Add group stage for the aggregate function
+        result_field = f'{func_name}({field})'
+        accumulator = {'MAX': '$max', 'MIN': '$min', 'SUM': '$sum', 'AVG': '$avg'}[func_name]
         pipeline.append({
-            '$project': {
-                field: {'$cond': [
-                    {'$isNumber': f'${field}'},
-                    f'${field}',
-                    {'$convert': {'input': f'${field}', 'to': 'double', 'onError': 0}}
-                ]},
-                '_id': 1
+            '$group': {
+                '_id': None,
+                result_field: {accumulator: numeric_field}
             }
         })
         
-        # Add group stage for the aggregate function
-        group_stage = {'$group': {'_id': None}}
-        
-        if func_name == 'MAX':
-            group_stage['$group'][f'{func_name}({field})'] = {'$max': f'${field}'}
-        elif func_name == 'MIN':
-            group_stage['$group'][f'{func_name}({field})'] = {'$min': f'${field}'}
-        elif func_name == 'SUM':
-            group_stage['$group'][f'{func_name}({field})'] = {'$sum': f'${field}'}
-        elif func_name == 'AVG':
-            group_stage['$group'][f'{func_name}({field})'] = {'$avg': f'${field}'}
-        
-        pipeline.append(group_stage)
-        
-        # Add ORDER BY using modular parser (if applicable for aggregate results)
-        if parsed_sql.get('order_by') or parsed_sql.get('original_sql'):
-            if parsed_sql.get('order_by'):
-                # Use parsed order_by if available
-                sort_spec = {}
-                for order_item in parsed_sql['order_by']:
-                    direction = 1 if order_item['direction'] == 'ASC' else -1
-                    # For aggregate results, we may need to map field names
-                    field_name = order_item['field']
-                    if field_name in [f'{func_name}({field})']:
-                        sort_spec[field_name] = direction
-                pipeline.append({'$sort': sort_spec})
-            else:
-                # Try to parse ORDER BY from original SQL
-                original_sql = parsed_sql.get('original_sql', '')
-                if original_sql:
-                    order_by_clause = self.orderby_parser.parse_order_by(original_sql)
-                    if order_by_clause and not order_by_clause.is_empty():
-                        sort_stages = self.orderby_translator.get_sort_pipeline_stage(order_by_clause)
-                        if sort_stages:
-                            pipeline.extend(sort_stages)
+        # Add ORDER BY - only the aggregate result field survives the $group
+        sort_spec = self._get_sort_spec(order_by, original_sql)
+        if result_field in sort_spec:
+            pipeline.append({'$sort': {result_field: sort_spec[result_field]}})
         
         # Remove the _id field in projection
         pipeline.append({'$project': {'_id': 0}})
@@ -708,11 +1098,22 @@ class MongoSQLTranslator:
         if not columns:
             raise Exception("No columns specified in SELECT")
         
+        # Driver probes like SELECT 1 or SELECT CURRENT_DATE skip the column loop
+        if len(columns) == 1 and isinstance(columns[0], str):
+            probe_projection = self._get_probe_projection(columns[0].strip())
+            if probe_projection is not None:
+                return {
+                    'operation': 'eval',
+                    'type': 'no_table_query',
+                    'projection': probe_projection
+                }
+        
         # Create a projection for each column
         projection = {}
+        function_columns = []
         
         for col in columns:
-            if isinstance(col, dict):
+            if type(col) is dict:
                 # Handle expressions and functions
                 if 'expression' in col:
                     # This is a computed expression
@@ -720,107 +1121,9 @@ class MongoSQLTranslator:
                     alias = col.get('alias', str(expr))
                     projection[alias] = {'$literal': self._evaluate_expression(expr)}
                 elif 'function' in col:
-                    # This is a function call
+                    # This is a function call - mapped once all columns are classified
                     func_name = col['function']
-                    
-                    # Handle both old format (args list) and new format (args_str)
-                    if 'args' in col:
-                        args = col['args']
-                    elif 'args_str' in col:
-                        # Parse the args_str to get individual arguments
-                        args_str = col['args_str']
-                        args = []
-                        if args_str:
-                            # Enhanced argument parsing - handle nested parentheses and quotes
-                            current_arg = ""
-                            in_quotes = False
-                            quote_char = None
-                            paren_depth = 0
-                            
-                            i = 0
-                            while i < len(args_str):
-                                char = args_str[i]
-                                if char in ("'", '"') and not in_quotes:
-                                    in_quotes = True
-                                    quote_char = char
-                                    current_arg += char
-                                elif char == quote_char and in_quotes:
-                                    # Check for escaped quotes
-                                    if i + 1 < len(args_str) and args_str[i + 1] == quote_char:
-                                        # Escaped quote, add both characters
-                                        current_arg += char + char
-                                        i += 1  # Skip next character
-                                    else:
-                                        # End of quoted string
-                                        in_quotes = False
-                                        quote_char = None
-                                        current_arg += char
-                                elif char == '(' and not in_quotes:
-                                    paren_depth += 1
-                                    current_arg += char
-                                elif char == ')' and not in_quotes:
-                                    paren_depth -= 1
-                                    current_arg += char
-                                elif char == ',' and not in_quotes and paren_depth == 0:
-                                    # Only split on commas at the top level (not inside quotes or parentheses)
-                                    args.append(current_arg.strip())
-                                    current_arg = ""
-                                else:
-                                    current_arg += char
-                                i += 1
-                            
-                            # Add the last argument
-                            if current_arg.strip():
-                                args.append(current_arg.strip())
-                        
-                        # Convert numeric arguments for better type handling
-                        converted_args = []
-                        for arg in args:
-                            # Check if this is a conditional function that needs quoted string preservation
-                            preserve_quotes = func_name.upper() in ['IF', 'CASE', 'COALESCE', 'NULLIF']
-                            
-                            # Handle quoted strings based on function type
-                            if ((arg.startswith("'") and arg.endswith("'")) or
-                                (arg.startswith('"') and arg.endswith('"'))):
-                                if preserve_quotes:
-                                    # Keep as quoted string for conditional functions
-                                    converted_args.append(arg)
-                                    continue
-                                else:
-                                    # Remove quotes for other functions (string, math, etc.)
-                                    arg = arg[1:-1]
-                            
-                            # Check if it's NULL literal
-                            if arg.upper() == 'NULL':
-                                converted_args.append(None)
-                                continue
-                            
-                            # Check if the argument contains function calls or mathematical expressions
-                            if self._contains_expression(arg):
-                                # Evaluate the expression
-                                try:
-                                    evaluated_arg = self._evaluate_argument_expression(arg)
-                                    converted_args.append(evaluated_arg)
-                                    continue
-                                except:
-                                    # If evaluation fails, continue with original logic
-                                    pass
-                            
-                            # Try to convert to number if it looks like a number
-                            try:
-                                # Check if it's an integer
-                                if '.' not in arg and arg.lstrip('-').isdigit():
-                                    converted_args.append(int(arg))
-                                # Check if it's a float
-                                else:
-                                    converted_args.append(float(arg))
-                            except ValueError:
-                                # If conversion fails, keep as string
-                                converted_args.append(arg)
-                        
-                        args = converted_args
-                    else:
-                        args = []
+                    preserve_quotes = func_name.upper() in _PRESERVE_QUOTE_FUNCS
                     
                     # Use original call for alias if available, otherwise use function name
                     if 'original_call' in col:
@@ -828,45 +1131,35 @@ class MongoSQLTranslator:
                     elif 'alias' in col:
                         alias = col['alias']
                     else:
-                        alias = f"{func_name}()"
+                        alias = intern(f"{func_name}()")
                     
-                    try:
-                        # Try to map the function
-                        function_mapping = self.function_mapper.map_function(func_name, args)
-                        projection[alias] = function_mapping
-                    except Exception as e:
-                        # Function not supported or error in mapping, return detailed error
-                        projection[alias] = {'$literal': f"Function {func_name} error: {str(e)}"}
+                    projection[alias] = None  # Reserve the slot so column order is kept
+                    function_columns.append((alias, func_name, self._get_function_column_args(col, preserve_quotes)))
                 else:
                     # Regular column reference (shouldn't happen without FROM)
                     col_name = col.get('column', str(col))
                     projection[col_name] = {'$literal': None}
             else:
                 # Simple column or expression string - check if it's a function call or SQL keyword
-                if isinstance(col, str):
+                if type(col) is str:
                     col_stripped = col.strip()
+                    col_upper = col_stripped.upper()
                     
                     # Check for SQL datetime keywords (no parentheses)
-                    sql_keywords = {
-                        'CURRENT_DATE': self.function_mapper.datetime_mapper._map_curdate([]),
-                        'CURRENT_TIME': self.function_mapper.datetime_mapper._map_curtime([]),
-                        'CURRENT_TIMESTAMP': self.function_mapper.datetime_mapper._map_now([]),
-                    }
-                    
-                    if col_stripped.upper() in sql_keywords:
-                        projection[col_stripped] = sql_keywords[col_stripped.upper()]
+                    keyword_expression = self.sql_datetime_keywords.get(col_upper)
+                    if keyword_expression is not None:
+                        projection[col_stripped] = copy.deepcopy(keyword_expression)
                         continue
                     
                     # Check if this looks like a function call (e.g., "NOW()", "YEAR('2024-12-25')")
                     if '(' in col_stripped and col_stripped.endswith(')'):
-                        func_call = self._parse_function_call(col_stripped)
+                        func_call = _parse_function_call(col_stripped)
                         if func_call:
-                            func_name = func_call['function']
-                            args = func_call.get('args', [])
+                            func_name, args = func_call
                             
                             try:
                                 # Try to map the function
-                                function_mapping = self.function_mapper.map_function(func_name, args)
+                                function_mapping = self._map_function_cached(func_name, list(args))
                                 projection[col_stripped] = function_mapping
                                 continue
                             except Exception as e:
@@ -874,33 +1167,37 @@ class MongoSQLTranslator:
                                 pass
                     
                     # Check if this has an alias (e.g., "1 as test", "col_name as alias")
-                    if ' as ' in col_stripped.lower():
-                        # Find the position of the last AS (case-insensitive)
-                        col_lower = col_stripped.lower()
-                        as_pos = col_lower.rfind(' as ')
-                        if as_pos != -1:
-                            expression_part = col_stripped[:as_pos].strip()
-                            alias_part = col_stripped[as_pos + 4:].strip()  # +4 for " as "
-                            
-                            # Try to evaluate the expression part
-                            try:
-                                result = eval(expression_part)  # Simple math expressions like "1"
-                                projection[alias_part] = {'$literal': result}
-                                continue
-                            except:
-                                # If eval fails, treat as literal string
-                                projection[alias_part] = {'$literal': expression_part}
-                                continue
+                    # Find the position of the last AS (case-insensitive) - upper-casing can
+                    # change the length of non-ASCII text, so only reuse col_upper when it lines up
+                    if len(col_upper) == len(col_stripped):
+                        as_pos = col_upper.rfind(' AS ')
+                    else:
+                        as_pos = col_stripped.lower().rfind(' as ')
+                    if as_pos != -1:
+                        expression_part = col_stripped[:as_pos].strip()
+                        alias_part = col_stripped[as_pos + 4:].strip()  # +4 for " as "
+                        
+                        # Try to evaluate the expression part
+                        try:
+                            result = _evaluate_constant_expression(expression_part)  # Simple math expressions like "1"
+                            projection[alias_part] = {'$literal': result}
+                            continue
+                        except Exception:
+                            # If evaluation fails, treat as literal string
+                            projection[alias_part] = {'$literal': expression_part}
+                            continue
                     
                     # Try to evaluate as expression (like "1+1")
                     try:
-                        result = eval(col_stripped)  # Simple math expressions
+                        result = _evaluate_constant_expression(col_stripped)  # Simple math expressions
                         projection[col_stripped] = {'$literal': result}
-                    except:
+                    except Exception:
                         projection[col_stripped] = {'$literal': col_stripped}
                 else:
                     projection[str(col)] = {'$literal': col}
         
+        self._map_function_columns(projection, function_columns)
+        
         # Return a special aggregation that creates a single document with the computed values
         # For no-table queries, we don't need a real collection - this will be handled specially
         return {
@@ -909,95 +1206,90 @@ class MongoSQLTranslator:
             'projection': projection
         }
     
+    def _get_probe_projection(self, col_stripped: str) -> Optional[Dict[str, Any]]:
+        """Build the projection for a single bare integer or datetime keyword column"""
+        if col_stripped.isascii() and col_stripped.isdigit():
+            return {col_stripped: {'$literal': int(col_stripped)}}
+        
+        keyword_expression = self.sql_datetime_keywords.get(col_stripped.upper())
+        if keyword_expression is not None:
+            return {col_stripped: copy.deepcopy(keyword_expression)}
+        
+        return None
+    
+    def _get_function_column_args(self, col: Dict[str, Any], preserve_quotes: bool = False) -> List[Any]:
+        """Get the converted arguments of a parsed function column"""
+        # Handle both old format (args list) and new format (args_str)
+        if 'args' in col:
+            return col['args']
+        if col.get('args_str'):
+            return list(_parse_and_coerce_args(col['args_str'], preserve_quotes))
+        return []
+    
+    def _map_function_columns(self, projection: Dict[str, Any], function_columns: List[Tuple[str, str, List[Any]]]) -> None:
+        """Map collected function columns back-to-back into their reserved projection slots"""
+        for field_name, func_name, args in function_columns:
+            try:
+                projection[field_name] = self._map_function_cached(func_name, args)
+            except Exception as e:
+                # Function not supported or error in mapping, return detailed error
+                projection[field_name] = {'$literal': f"Function {func_name} error: {str(e)}"}
+    
+    def _map_function_cached(self, func_name: str, args: List[Any]) -> Dict[str, Any]:
+        """Map a function through the mapping cache - the returned expression is shared, don't mutate it"""
+        # Types are part of the key so 1, 1.0 and True don't share an entry
+        cache_key = (func_name, tuple((type(arg), arg) for arg in args))
+        try:
+            function_mapping = self.function_mapping_cache.get(cache_key)
+        except TypeError:
+            # Unhashable arguments (lists, dicts) can't be cached
+            return self.function_mapper.map_function(func_name, args)
+        
+        if function_mapping is not None:
+            self.function_mapping_cache.move_to_end(cache_key)
+            return function_mapping
+        
+        function_mapping = self.function_mapper.map_function(func_name, args)
+        self.function_mapping_cache[cache_key] = function_mapping
+        if len(self.function_mapping_cache) > self.function_mapping_cache_size:
+            self.function_mapping_cache.popitem(last=False)
+        return function_mapping
+    
     def _evaluate_expression(self, expr):
         """Evaluate simple expressions like 1+1"""
         try:
             # For safety, only allow simple math expressions
             if isinstance(expr, str) and all(c in '0123456789+-*/.() ' for c in expr):
-                return eval(expr)
+                return _evaluate_constant_expression(expr)
             else:
                 return str(expr)
-        except:
+        except Exception:
             return str(expr)
     
-    def _parse_function_call(self, func_str: str) -> Optional[Dict[str, Any]]:
-        """Parse a function call string like 'NOW()' or 'YEAR('2024-12-25')' into components"""
-        if not func_str or not func_str.strip():
-            return None
-            
-        func_str = func_str.strip()
-        
-        # Must have parentheses
-        if not ('(' in func_str and func_str.endswith(')')):
-            return None
-        
-        # Extract function name and arguments
-        paren_idx = func_str.find('(')
-        func_name = func_str[:paren_idx].strip().upper()
-        
-        # Extract arguments (everything between parentheses)
-        args_str = func_str[paren_idx + 1:-1].strip()
-        
-        args = []
-        if args_str:
-            # Enhanced argument parsing - handle nested parentheses and quotes
-            current_arg = ""
-            in_quotes = False
-            quote_char = None
-            paren_depth = 0
-            
-            for char in args_str:
-                if char in ("'", '"') and not in_quotes:
-                    in_quotes = True
-                    quote_char = char
-                    current_arg += char
-                elif char == quote_char and in_quotes:
-                    in_quotes = False
-                    quote_char = None
-                    current_arg += char
-                elif char == '(' and not in_quotes:
-                    paren_depth += 1
-                    current_arg += char
-                elif char == ')' and not in_quotes:
-                    paren_depth -= 1
-                    current_arg += char
-                elif char == ',' and not in_quotes and paren_depth == 0:
-                    # Only split on commas at the top level (not inside parentheses)
-                    args.append(current_arg.strip())
-                    current_arg = ""
-                else:
-                    current_arg += char
-            
-            # Add the last argument
-            if current_arg.strip():
-                args.append(current_arg.strip())
-        
-        return {
-            'function': func_name,
-            'args': args
-        }
-
     def _handle_function_with_from(self, parsed_sql: Dict[str, Any]) -> Dict[str, Any]:
         """Handle SELECT queries with functions that have FROM clause using aggregation pipeline"""
+        where = parsed_sql.get('where')
+        subqueries = parsed_sql.get('subqueries')
+        limit_info = parsed_sql.get('limit')
+        from_table = parsed_sql.get('from')
         pipeline = []
         
         # Add match stage if WHERE clause exists
-        if parsed_sql.get('where'):
-            match_filter = self._translate_where(parsed_sql['where'])
+        if where:
+            match_filter = self._translate_where(where)
             if match_filter:
                 pipeline.append({'$match': match_filter})
         
         # Add subquery stages if subqueries exist
-        if parsed_sql.get('subqueries'):
+        if subqueries:
             subquery_stages = self.subquery_translator.translate_subqueries_to_pipeline(
-                parsed_sql['subqueries'], 
-                parsed_sql.get('from', '')
+                subqueries, 
+                from_table or ''
             )
             pipeline.extend(subquery_stages)
         
         # Add limit stage if LIMIT exists (before project to improve performance)
-        if parsed_sql.get('limit'):
-            limit_info = parsed_sql['limit']
+        if limit_info:
             if 'offset' in limit_info:
                 pipeline.append({'$skip': limit_info['offset']})
             if 'count' in limit_info:
@@ -1005,105 +1297,31 @@ class MongoSQLTranslator:
         
         # Build projection stage with function evaluation
         projection_stage = {}
+        function_columns = []
         
         for col in parsed_sql['columns']:
-            if isinstance(col, dict) and 'function' in col:
-                # Function column
+            if type(col) is dict and 'function' in col:
+                # Function column - mapped once all columns are classified
                 func_name = col['function']
-                args = []
-                
-                # Parse arguments from args_str
-                if 'args_str' in col and col['args_str']:
-                    args_str = col['args_str']
-                    args = []
-                    
-                    if args_str:
-                        # Enhanced argument parsing - handle nested parentheses and quotes
-                        current_arg = ""
-                        in_quotes = False
-                        quote_char = None
-                        paren_depth = 0
-                        
-                        for char in args_str:
-                            if char in ("'", '"') and not in_quotes:
-                                in_quotes = True
-                                quote_char = char
-                                current_arg += char
-                            elif char == quote_char and in_quotes:
-                                in_quotes = False
-                                quote_char = None
-                                current_arg += char
-                            elif char == '(' and not in_quotes:
-                                paren_depth += 1
-                                current_arg += char
-                            elif char == ')' and not in_quotes:
-                                paren_depth -= 1
-                                current_arg += char
-                            elif char == ',' and not in_quotes and paren_depth == 0:
-                                # Only split on commas at the top level (not inside parentheses)
-                                args.append(current_arg.strip())
-                                current_arg = ""
-                            else:
-                                current_arg += char
-                        
-                        # Add the last argument
-                        if current_arg.strip():
-                            args.append(current_arg.strip())
-                    
-                    # Convert numeric arguments for better type handling
-                    converted_args = []
-                    for arg in args:
-                        # Remove quotes if they exist
-                        if arg.startswith("'") and arg.endswith("'"):
-                            arg = arg[1:-1]
-                        elif arg.startswith('"') and arg.endswith('"'):
-                            arg = arg[1:-1]
-                        
-                        # Check if the argument contains function calls or mathematical expressions
-                        if self._contains_expression(arg):
-                            # Evaluate the expression
-                            try:
-                                evaluated_arg = self._evaluate_argument_expression(arg)
-                                converted_args.append(evaluated_arg)
-                                continue
-                            except:
-                                # If evaluation fails, continue with original logic
-                                pass
-                        
-                        # Try to convert to number if it looks like a number
-                        try:
-                            # Check if it's an integer
-                            if '.' not in arg and arg.lstrip('-').isdigit():
-                                converted_args.append(int(arg))
-                            # Check if it's a float
-                            else:
-                                converted_args.append(float(arg))
-                        except ValueError:
-                            # If conversion fails, keep as string
-                            converted_args.append(arg)
-                    
-                    args = converted_args
                 
                 # Use original_call as field name if available
-                field_name = col.get('original_call', f"{func_name}({col.get('args_str', '')})")
+                # Interned so the pipeline's repeated field names hash and compare by identity
+                field_name = intern(col.get('original_call', f"{func_name}({col.get('args_str', '')})"))
                 
-                try:
-                    # Map the function to MongoDB equivalent
-                    function_mapping = self.function_mapper.map_function(func_name, args)
-                    projection_stage[field_name] = function_mapping
-                except Exception as e:
-                    # Function not supported or error in mapping
-                    projection_stage[field_name] = {'$literal': f"Function {func_name} error: {str(e)}"}
+                projection_stage[field_name] = None  # Reserve the slot so column order is kept
+                function_columns.append((field_name, func_name, self._get_function_column_args(col)))
             
-            elif isinstance(col, dict) and 'column' in col:
+            elif type(col) is dict and 'column' in col:
                 # Regular column with alias
                 col_name = col['column']
-                projection_stage[col_name] = f"${col_name}"
+                projection_stage[intern(col_name)] = field_reference(col_name)
             
             else:
                 # Simple column name
-                if isinstance(col, str):
-                    projection_stage[col] = f"${col}"
+                if type(col) is str:
+                    projection_stage[intern(col)] = field_reference(col)
+        
+        self._map_function_columns(projection_stage, function_columns)
         
         # Add the projection stage
         if projection_stage:
@@ -1111,83 +1329,26 @@ class MongoSQLTranslator:
         
         return {
             'operation': 'aggregate',
-            'collection': parsed_sql.get('from'),
+            'collection': from_table,
             'pipeline': pipeline
         }
     
-    def _contains_expression(self, arg_str: str) -> bool:
-        """Check if the argument string contains function calls or mathematical expressions"""
-        # Check for function calls (contains parentheses)
-        if '(' in arg_str and ')' in arg_str:
-            return True
-        
-        # Check for mathematical operators, but exclude leading negative signs
-        # A leading negative sign alone doesn't make it an expression
-        arg_stripped = arg_str.strip()
-        if arg_stripped.startswith('-'):
-            # Check if it's just a negative number
-            remaining = arg_stripped[1:]
-            if remaining.replace('.', '').isdigit():
-                return False  # It's just a negative number
-            # Check for operators after the negative sign
-            for op in ['+', '-', '*', '/', '%', '^']:
-                if op in remaining:
-                    return True
-        else:
-            # Check for mathematical operators
-            math_operators = ['+', '-', '*', '/', '%', '^']
-            for op in math_operators:
-                if op in arg_str:
-                    return True
-        
-        return False
-    
-    def _evaluate_argument_expression(self, arg_str: str) -> Any:
-        """Evaluate a mathematical expression or function call in an argument"""
-        # Handle PI()/2 specifically since it's a common pattern
-        if arg_str == 'PI()/2':
-            import math
-            return math.pi / 2
-        
-        # Handle PI() function calls
-        if 'PI()' in arg_str:
-            import math
-            # Replace PI() with the actual value and evaluate
-            expr = arg_str.replace('PI()', str(math.pi))
-            try:
-                return eval(expr)
-            except:
-                pass
-        
-        # For more complex expressions, we could parse them properly
-        # but for now, handle the most common cases
-        if '/' in arg_str:
-            parts = arg_str.split('/')
-            if len(parts) == 2:
-                try:
-                    left = float(parts[0].strip())
-                    right = float(parts[1].strip())
-                    return left / right
-                except:
-                    pass
-        
-        # If all else fails, return the original string
-        return arg_str
-    
     def _handle_case_when_with_from(self, case_expression: dict, parsed_query: dict) -> dict:
         """Handle CASE WHEN expressions in MongoDB aggregation pipeline"""
+        where = parsed_query.get('where')
+        limit_info = parsed_query.get('limit')
+        
         # Build the MongoDB aggregation pipeline with $switch
         pipeline = []
         
         # Add $match stage if there's a WHERE clause
-        if parsed_query.get('where'):
-            match_filter = self._translate_where(parsed_query['where'])
+        if where:
+            match_filter = self._translate_where(where)
             if match_filter:
                 pipeline.append({'$match': match_filter})
         
         # Add $limit stage if specified
-        if parsed_query.get('limit'):
-            limit_info = parsed_query['limit']
+        if limit_info:
             if 'offset' in limit_info:
                 pipeline.append({'$skip': limit_info['offset']})
             if 'count' in limit_info:
@@ -1253,85 +1414,41 @@ class MongoSQLTranslator:
     
     def _parse_condition_for_mongo(self, condition: str) -> dict:
         """Parse a CASE WHEN condition into MongoDB expression"""
-        condition = condition.strip()
-        
-        # Handle simple equality conditions like "column = 'value'" or "1 = 1"
-        if '=' in condition and '<>' not in condition and '>=' not in condition and '<=' not in condition:
-            parts = condition.split('=', 1)
-            if len(parts) == 2:
-                left = parts[0].strip()
-                right = parts[1].strip().strip("'\"")
-                
-                # Handle literal comparison like "1 = 1"
-                if left.isdigit() and right.isdigit():
-                    left_val = int(left)
-                    right_val = int(right)
-                    return {"$eq": [left_val, right_val]}
-                
-                # Handle field references (remove backticks if present)
-                if left.startswith('`') and left.endswith('`'):
-                    left = left[1:-1]
-                
-                # Check if left side is a literal or field reference
-                if left.isdigit():
-                    # Literal comparison
-                    try:
-                        right_val = float(right)
-                    except ValueError:
-                        right_val = right
-                    return {"$eq": [int(left), right_val]}
-                else:
-                    # Field reference
-                    return {"$eq": [f"${left}", right]}
-        
-        # Handle greater than conditions
-        elif '>' in condition and not '>=' in condition:
-            parts = condition.split('>', 1)
-            if len(parts) == 2:
-                field = parts[0].strip()
-                value = parts[1].strip().strip("'\"")
-                
-                # Handle field references (remove backticks if present)
-                if field.startswith('`') and field.endswith('`'):
-                    field = field[1:-1]
-                
-                # Try to convert to number if possible
-                try:
-                    value = float(value)
-                except ValueError:
-                    pass
-                
-                # Make sure we reference the field correctly
-                return {"$gt": [f"${field}", value]}
-        
-        # Handle less than conditions
-        elif '<' in condition and not '<=' in condition and not '<>' in condition:
-            parts = condition.split('<', 1)
-            if len(parts) == 2:
-                field = parts[0].strip()
-                value = parts[1].strip().strip("'\"")
-                
-                if field.startswith('`') and field.endswith('`'):
-                    field = field[1:-1]
-                
-                try:
-                    value = float(value)
-                except ValueError:
-                    pass
-                
-                return {"$lt": [f"${field}", value]}
+        comparison = _split_comparison(condition)
+        if comparison:
+            left, comparison_op, right = comparison
+            mongo_operator = self.comparison_operator_map.get(comparison_op, '$eq')
+            return {mongo_operator: [self._parse_condition_operand(left, True),
+                                     self._parse_condition_operand(right, False)]}
         
         # For more complex conditions, return a basic structure
         # This would need to be expanded for full condition parsing
-        print(f"WARNING: Complex condition not fully parsed: {condition}")
+        print(f"WARNING: Complex condition not fully parsed: {condition.strip()}")
         return {"$literal": True}  # Default to true for unparsed conditions
     
+    def _parse_condition_operand(self, operand: str, is_left: bool) -> Any:
+        """Convert one side of a CASE WHEN comparison to a field reference or literal"""
+        # Backticked names are always field references
+        if len(operand) > 1 and operand[0] == '`' and operand[-1] == '`':
+            return f"${operand[1:-1]}"
+        
+        # Quoted strings are literals
+        if _is_quoted(operand):
+            return operand[1:-1]
+        
+        value = _convert_literal(operand)
+        
+        # A bare name on the left is the field being compared
+        if is_left and isinstance(value, str):
+            return f"${value}"
+        return value
+    
     def _parse_value_for_mongo(self, value: str) -> Any:
         """Parse a CASE WHEN result value into MongoDB expression"""
         value = value.strip()
         
         # Handle string literals
-        if (value.startswith("'") and value.endswith("'")) or (value.startswith('"') and value.endswith('"')):
+        if _is_quoted(value):
             return value[1:-1]  # Remove quotes
         
         # Handle field references
@@ -1356,70 +1473,55 @@ class MongoSQLTranslator:
     
     def _handle_subquery_select(self, parsed_sql: Dict[str, Any]) -> Dict[str, Any]:
         """Handle SELECT queries with subqueries using aggregation pipeline"""
-        pipeline = []
+        where = parsed_sql.get('where')
+        subqueries = parsed_sql.get('subqueries') or []
+        limit_info = parsed_sql.get('limit')
+        from_table = parsed_sql.get('from')
         
-        # Add match stage if WHERE clause exists
-        if parsed_sql.get('where'):
-            match_filter = self._translate_where(parsed_sql['where'])
-            if match_filter:
-                pipeline.append({'$match': match_filter})
+        # Match stage if WHERE clause exists
+        match_filter = self._translate_where(where) if where else None
         
-        # Add subquery stages
+        # Subquery stages
         subquery_stages = self.subquery_translator.translate_subqueries_to_pipeline(
-            parsed_sql['subqueries'], 
-            parsed_sql.get('from', '')
+            subqueries, 
+            from_table or ''
         )
-        pipeline.extend(subquery_stages)
         
-        # Build projection stage for selected columns
-        projection_stage = {}
+        # Check if we have DERIVED subqueries that affect field mapping - the parser
+        # flags this once, hand-built statements fall back to scanning the list
+        has_derived_subquery = parsed_sql.get('has_derived_subquery')
+        if has_derived_subquery is None:
+            has_derived_subquery = any(
+                subq.subquery_type is SubqueryType.DERIVED
+                for subq in subqueries
+            )
         
-        # Check if we have DERIVED subqueries that affect field mapping
-        has_derived_subquery = any(
-            subq.subquery_type == SubqueryType.DERIVED
-            for subq in parsed_sql.get('subqueries', [])
+        # Build projection stage for selected columns - the column list is reduced to a
+        # hashable key so repeated SELECT lists reuse the cached projection
+        columns_key = tuple(
+            col if type(col) is str
+            else ('column', col['column']) if type(col) is dict and 'column' in col
+            else None
+            for col in parsed_sql['columns']
         )
-        
-        for col in parsed_sql['columns']:
-            if col == '*':
-                # Select all fields - don't add specific projection
-                projection_stage = {}
-                break
-            elif isinstance(col, str):
-                if has_derived_subquery and '.' in col:
-                    # Handle aliased column references for DERIVED subqueries
-                    # e.g., "c.customerName" -> "customerName", "o.total_orders" -> "total_orders"
-                    alias, field = col.split('.', 1)
-                    if alias == 'c':
-                        # Main table alias - map to root field with clean name
-                        projection_stage[field] = f"${field}"
-                    elif alias == 'o':
-                        # Derived table alias - map to derived_orders field with clean name
-                        projection_stage[field] = f"$derived_orders.{field}"
-                    else:
-                        # Unknown alias - use field name as-is
-                        projection_stage[field] = f"${col}"
-                else:
-                    # Normal column mapping
-                    projection_stage[col] = f"${col}"
-            elif isinstance(col, dict) and 'column' in col:
-                col_name = col['column']
-                projection_stage[col_name] = f"${col_name}"
-        
-        # Add projection stage if we have specific columns
-        if projection_stage:
-            pipeline.append({'$project': projection_stage})
-        
-        # Add limit stage if LIMIT exists
-        if parsed_sql.get('limit'):
-            limit_info = parsed_sql['limit']
-            if 'offset' in limit_info:
-                pipeline.append({'$skip': limit_info['offset']})
-            if 'count' in limit_info:
-                pipeline.append({'$limit': limit_info['count']})
+        projection_stage = dict(_build_subquery_projection(columns_key, has_derived_subquery))
+        
+        # Assemble the pipeline in one pass - stages that don't apply are None
+        limit_info = limit_info or {}
+        pipeline = [
+            stage for stage in (
+                {'$match': match_filter} if match_filter else None,
+                *subquery_stages,
+                # Projection stage only if we have specific columns
+                {'$project': projection_stage} if projection_stage else None,
+                {'$skip': limit_info['offset']} if 'offset' in limit_info else None,
+                {'$limit': limit_info['count']} if 'count' in limit_info else None,
+            )
+            if stage is not None
+        ]
         
         return {
             'operation': 'aggregate',
-            'collection': parsed_sql.get('from'),
+            'collection': from_table,
             'pipeline': pipeline
         }
@@ -2,17 +2,100 @@
 MongoDB client for connecting to and executing queries on MongoDB
 """
 from pymongo import MongoClient
-from pymongo.errors import ConnectionFailure, OperationFailure
-from typing import Dict, List, Any, Optional
+from pymongo import ReadPreference
+from pymongo.errors import BulkWriteError, ConnectionFailure, OperationFailure
+from pymongo.read_concern import ReadConcern
+from pymongo.write_concern import WriteConcern
+from typing import Dict, List, Any, Optional, Set, Tuple
+from functools import lru_cache
+from datetime import datetime, timedelta
+import atexit
+import calendar
+import math
+import socket
 import threading
 
+# Accepted input formats for time-part extraction (HOUR/MINUTE/SECOND) and general date parsing
+_TIME_FORMATS = ('%Y-%m-%dT%H:%M:%S', '%Y-%m-%d %H:%M:%S', '%H:%M:%S')
+_DATE_FORMATS = ('%Y-%m-%d %H:%M:%S', '%Y-%m-%d', '%H:%M:%S')
+
+# Read preferences accepted by MongoDBClient(read_preference=...)
+_READ_PREFERENCES = {
+    'primary': ReadPreference.PRIMARY,
+    'primaryPreferred': ReadPreference.PRIMARY_PREFERRED,
+    'secondary': ReadPreference.SECONDARY,
+    'secondaryPreferred': ReadPreference.SECONDARY_PREFERRED,
+    'nearest': ReadPreference.NEAREST,
+}
+
+# Operations that never write and may be routed according to the read preference
+_READ_OPERATIONS = frozenset({'find', 'aggregate', 'distinct', 'count'})
+
+# Errors a malformed or non-numeric operand can raise while evaluating a no-table expression
+_EVALUATION_ERRORS = (ArithmeticError, AttributeError, LookupError, TypeError, ValueError)
+
+
+def _iso_layout(date_string: str) -> Optional[str]:
+    """Return the strptime format of a fixed-width ISO date/datetime string, if it is one"""
+    if type(date_string) is not str or date_string[4:5] != '-' or date_string[7:8] != '-':
+        return None
+    if len(date_string) == 10:
+        return '%Y-%m-%d'
+    if len(date_string) == 19 and date_string[13] == ':' and date_string[16] == ':':
+        if date_string[10] == ' ':
+            return '%Y-%m-%d %H:%M:%S'
+        if date_string[10] == 'T':
+            return '%Y-%m-%dT%H:%M:%S'
+    return None
+
+
+@lru_cache(maxsize=1024)
+def _parse_date(date_string: str, formats: tuple) -> Optional[datetime]:
+    """Parse a date string with the first matching format, or None if none match"""
+    # Plain ISO dates/datetimes go through the C-level fromisoformat parser
+    if _iso_layout(date_string) in formats:
+        try:
+            return datetime.fromisoformat(date_string)
+        except ValueError:
+            pass
+    for fmt in formats:
+        try:
+            return datetime.strptime(date_string, fmt)
+        except (TypeError, ValueError):
+            continue
+    return None
+
+
+def _build_connection_string(host: str, port: int, username: Optional[str], password: Optional[str],
+                             retry_writes: str, write_concern: str, app_name: str) -> str:
+    """Build the MongoDB URI, using the MongoDB+SRV format for Atlas hosts"""
+    srv = 'mongodb.net' in host
+    if username and password:
+        # Use SRV format for MongoDB Atlas connections
+        if srv:
+            return f"mongodb+srv://{username}:{password}@{host}/?retryWrites={retry_writes}&w={write_concern}&appName={app_name}"
+        # Fallback to standard format for local/other MongoDB instances
+        return f"mongodb://{username}:{password}@{host}:{port}/"
+    # For connections without authentication
+    if srv:
+        return f"mongodb+srv://{host}/?retryWrites={retry_writes}&w={write_concern}&appName={app_name}"
+    return f"mongodb://{host}:{port}/"
+
+
 class MongoDBClient:
     """MongoDB database client with connection pooling"""
     
     _instance = None
     _lock = threading.Lock()
-    _client = None
-    _connection_params = None
+    # Projection used for find() when the query does not specify one; never mutated
+    _DEFAULT_PROJECTION = {'_id': 0}
+    # Collation applied to sorted reads to match MariaDB's utf8mb4_unicode_ci ordering
+    _MARIADB_COLLATION = {
+        'locale': 'en',
+        'caseLevel': False,  # Case-insensitive like utf8mb4_unicode_ci
+        'strength': 1,       # Primary level only (ignore case, accents)
+        'numericOrdering': False
+    }
     
     def __new__(cls, *args, **kwargs):
         """Singleton pattern for connection reuse"""
@@ -24,7 +107,11 @@ class MongoDBClient:
     
     def __init__(self, host: str = 'localhost', port: int = 27017, 
                  database: str = None, username: str = None, password: str = None,
-                 retry_writes: str = 'true', write_concern: str = 'majority', app_name: str = 'MongoSQL'):
+                 retry_writes: str = 'true', write_concern: str = 'majority', app_name: str = 'MongoSQL',
+                 max_pool_size: int = 100, min_pool_size: int = 0, max_idle_time_ms: int = 300_000,
+                 wait_queue_timeout_ms: int = 10_000, connect_timeout_ms: int = 20_000,
+                 socket_timeout_ms: Optional[int] = None, compressors: Optional[str] = None,
+                 read_preference: str = 'primary'):
         # Only initialize once
         if hasattr(self, '_initialized'):
             return
@@ -37,7 +124,83 @@ class MongoDBClient:
         self.retry_writes = retry_writes
         self.write_concern = write_concern
         self.app_name = app_name
+        # Connection pool settings passed straight through to MongoClient
+        self.max_pool_size = max_pool_size
+        self.min_pool_size = min_pool_size
+        self.max_idle_time_ms = max_idle_time_ms
+        self.wait_queue_timeout_ms = wait_queue_timeout_ms
+        self.connect_timeout_ms = connect_timeout_ms
+        self.socket_timeout_ms = socket_timeout_ms
+        self.compressors = compressors
+        if read_preference not in _READ_PREFERENCES:
+            raise ValueError(f"Unknown read preference '{read_preference}'")
+        self.read_preference = read_preference
+        # Host and credentials are fixed for the lifetime of the client, so the URI
+        # and pool options are built once here
+        self._connection_string = _build_connection_string(host, port, username, password,
+                                                           retry_writes, write_concern, app_name)
+        pool_options = {
+            'maxPoolSize': max_pool_size,
+            'minPoolSize': min_pool_size,
+            'maxIdleTimeMS': max_idle_time_ms,
+            'waitQueueTimeoutMS': wait_queue_timeout_ms,
+            'connectTimeoutMS': connect_timeout_ms,
+            'socketTimeoutMS': socket_timeout_ms,
+        }
+        if compressors:
+            pool_options['compressors'] = compressors
+        self._pool_options = tuple(pool_options.items())
         self.database = None
+        self.client = None
+        self._connection_params = None
+        # (collection, field) pairs known to exist in the current database
+        self._known_fields: Set[Tuple[str, str]] = set()
+        # Read-only collection views for non-primary read preferences, keyed by (database, collection)
+        self._read_collection_cache: Dict[Tuple[str, str], Any] = {}
+        # Dispatch table for no-table expression evaluation, keyed by MongoDB operator
+        self.expression_handlers = {
+            '$dateToString': self._eval_date_to_string,
+            '$hour': self._eval_hour,
+            '$minute': self._eval_minute,
+            '$second': self._eval_second,
+            '$add': self._eval_add,
+            '$cond': self._eval_cond,
+            '$gte': self._eval_gte,
+            '$subtract': self._eval_subtract,
+            '$toInt': self._eval_to_int,
+            '$divide': self._eval_divide,
+            '$abs': self._eval_abs,
+            '$toUpper': self._eval_to_upper,
+            '$toLower': self._eval_to_lower,
+            '$concat': self._eval_concat,
+            '$strLenCP': self._eval_str_len_cp,
+            '$substr': self._eval_substr,
+            '$trim': self._eval_trim,
+            '$replaceAll': self._eval_replace_all,
+            '$reverse': self._eval_reverse,
+            '$round': self._eval_round,
+            '$ceil': self._eval_ceil,
+            '$floor': self._eval_floor,
+            '$sqrt': self._eval_sqrt,
+            '$pow': self._eval_pow,
+            '$sin': self._eval_sin,
+            '$cos': self._eval_cos,
+            '$ln': self._eval_ln,
+            '$max': self._eval_max,
+            '$dateFromParts': self._eval_date_from_parts,
+            '$dateAdd': self._eval_date_add,
+            '$dateSubtract': self._eval_date_subtract,
+            '$dateFromString': self._eval_date_from_string,
+            '$year': self._eval_year,
+            '$month': self._eval_month,
+            '$toDays': self._eval_to_days,
+            '$timestampAdd': self._eval_timestamp_add,
+            '$addTime': self._eval_add_time,
+            '$subTime': self._eval_sub_time,
+            '$dayOfMonth': self._eval_day_of_month,
+            '$eq': self._eval_eq,
+            '$ifNull': self._eval_if_null,
+        }
         self._initialized = True
     
     def connect(self):
@@ -45,48 +208,51 @@ class MongoDBClient:
         # Check if we already have a connection with the same parameters
         current_params = (self.host, self.port, self.username, self.password, self.database_name)
         
-        if MongoDBClient._client is not None and MongoDBClient._connection_params == current_params:
+        if self.client is not None and self._connection_params == current_params:
             # Reuse existing connection
-            self.client = MongoDBClient._client
             if self.database_name:
                 self.database = self.client[self.database_name]
             return
         
         try:
-            # Build connection string using MongoDB+SRV format for Atlas
-            if self.username and self.password:
-                # Use SRV format for MongoDB Atlas connections
-                if 'mongodb.net' in self.host:
-                    connection_string = f"mongodb+srv://{self.username}:{self.password}@{self.host}/?retryWrites={self.retry_writes}&w={self.write_concern}&appName={self.app_name}"
-                else:
-                    # Fallback to standard format for local/other MongoDB instances
-                    connection_string = f"mongodb://{self.username}:{self.password}@{self.host}:{self.port}/"
-            else:
-                # For connections without authentication
-                if 'mongodb.net' in self.host:
-                    connection_string = f"mongodb+srv://{self.host}/?retryWrites={self.retry_writes}&w={self.write_concern}&appName={self.app_name}"
-                else:
-                    connection_string = f"mongodb://{self.host}:{self.port}/"
-            
-            self.client = MongoClient(connection_string, serverSelectionTimeoutMS=5000)
+            # Connection arguments are fixed for the lifetime of the instance, so an
+            # existing client is re-validated rather than replaced
+            client = self.client
+            if client is None:
+                client = MongoClient(self._connection_string, serverSelectionTimeoutMS=5000,
+                                     appname=self.app_name, **dict(self._pool_options))
             
-            # Test connection and authentication
-            self.client.admin.command('ping')
+            # Test connection and authentication; a client that fails is closed
+            try:
+                client.admin.command('ping')
+            except Exception:
+                client.close()
+                self.client = None
+                self._connection_params = None
+                self._read_collection_cache.clear()
+                raise
+            self.client = client
             
-            # Cache the connection
-            MongoDBClient._client = self.client
-            MongoDBClient._connection_params = current_params
+            # Remember which parameters the current client was validated for
+            self._connection_params = current_params
             
             # If we have credentials, test access to the specific database
             if self.database_name and (self.username or self.password):
-                test_db = self.client[self.database_name]
-                # Try to list collections to verify database access
-                collections = list(test_db.list_collection_names(maxTimeMS=5000))
-                
-                # Check if database actually exists (has collections)
-                all_db_names = [db['name'] for db in self.client.list_databases()]
-                if self.database_name not in all_db_names:
-                    raise Exception(f"ERROR 1049 (42000): Unknown database '{self.database_name}'")
+                # listDatabases only returns databases the user is authorized for, so the
+                # common case needs a single call
+                authorized_db_names = set(self.client.list_database_names())
+                if self.database_name not in authorized_db_names:
+                    # Not listed: the database is either missing or hidden from this user,
+                    # so probe it directly to tell the two apart
+                    try:
+                        collections = self.client[self.database_name].list_collection_names(maxTimeMS=5000)
+                    except OperationFailure as e:
+                        if e.code == 13:  # Unauthorized
+                            hostname = socket.gethostname()
+                            raise Exception(f"ERROR 1044 (42000): Access denied for user '{self.username}'@'{hostname}' to database '{self.database_name}'")
+                        raise
+                    if not collections:
+                        raise Exception(f"ERROR 1049 (42000): Unknown database '{self.database_name}'")
             
             # Set the database if specified
             if self.database_name:
@@ -100,18 +266,16 @@ class MongoDBClient:
             raise Exception(f"ERROR 2003 (HY000): Can't connect to MongoDB server on '{self.host}' ({e})")
         except OperationFailure as e:
             if e.code == 18:  # Authentication failed
-                import socket
                 hostname = socket.gethostname()
                 raise Exception(f"ERROR 1045 (28000): Access denied for user '{self.username}'@'{hostname}' (using password: YES)")
             else:
                 raise Exception(f"ERROR 1045 (28000): Access denied for user '{self.username}'@'{self.host}' (using password: YES)")
         except Exception as e:
             error_msg = str(e)
-            if 'ERROR 1049' in error_msg:
+            if 'ERROR 1049' in error_msg or 'ERROR 1044' in error_msg:
                 # Re-raise database errors as-is
                 raise e
             elif 'authentication' in error_msg.lower() or 'unauthorized' in error_msg.lower() or 'access denied' in error_msg.lower():
-                import socket
                 hostname = socket.gethostname()
                 raise Exception(f"ERROR 1045 (28000): Access denied for user '{self.username}'@'{hostname}' (using password: YES)")
             else:
@@ -119,37 +283,48 @@ class MongoDBClient:
     
     def close(self):
         """Close the MongoDB connection"""
-        if self._client:
-            self._client.close()
+        if self.client:
+            self.client.close()
+            self.client = None
+            self._connection_params = None
+            self._read_collection_cache.clear()
     
     def field_exists(self, collection_name: str, field_name: str) -> bool:
         """Check if a field exists in the collection"""
         if self.database is None:
             return False
         
+        cache_key = (collection_name, field_name)
+        if cache_key in self._known_fields:
+            return True
+        
         collection = self.database[collection_name]
         # Check if any document has this field
-        result = collection.find_one({field_name: {"$exists": True}})
-        return result is not None
+        result = collection.find_one({field_name: {"$exists": True}}, {field_name: 1, '_id': 0})
+        if result is None:
+            # Not cached: a later insert may still add the field
+            return False
+        
+        self._known_fields.add(cache_key)
+        return True
     
     def _extract_field_references(self, expression) -> List[str]:
         """Extract field references from MongoDB aggregation expressions"""
         fields = []
-        
-        if isinstance(expression, str) and expression.startswith('$'):
-            # Direct field reference like "$field_name"
-            fields.append(expression[1:])  # Remove the $ prefix
-        elif isinstance(expression, dict):
-            # Recursive search in nested expressions
-            for value in expression.values():
-                if isinstance(value, (dict, list)):
-                    fields.extend(self._extract_field_references(value))
-                elif isinstance(value, str) and value.startswith('$'):
-                    fields.append(value[1:])  # Remove the $ prefix
-        elif isinstance(expression, list):
-            # Search in array elements
-            for item in expression:
-                fields.extend(self._extract_field_references(item))
+        # Walk the expression tree with an explicit stack; children are pushed in
+        # reverse so references come out in document order
+        stack = [expression]
+        
+        while stack:
+            node = stack.pop()
+            if isinstance(node, str):
+                if node.startswith('$'):
+                    # Direct field reference like "$field_name"
+                    fields.append(node[1:])  # Remove the $ prefix
+            elif isinstance(node, dict):
+                stack.extend(reversed(list(node.values())))
+            elif isinstance(node, list):
+                stack.extend(reversed(node))
         
         return fields
     
@@ -162,19 +337,19 @@ class MongoDBClient:
     def _extract_filter_fields(self, filter_doc: Dict[str, Any]) -> set:
         """Extract field names from MongoDB filter document"""
         fields = set()
-        
-        for key, value in filter_doc.items():
-            if key.startswith('$'):
-                # Logical operators like $and, $or
-                if isinstance(value, list):
-                    for item in value:
-                        if isinstance(item, dict):
-                            fields.update(self._extract_filter_fields(item))
-                elif isinstance(value, dict):
-                    fields.update(self._extract_filter_fields(value))
-            else:
-                # Regular field name
-                fields.add(key)
+        stack = [filter_doc]
+        
+        while stack:
+            for key, value in stack.pop().items():
+                if key.startswith('$'):
+                    # Logical operators like $and, $or
+                    if isinstance(value, list):
+                        stack.extend(item for item in value if isinstance(item, dict))
+                    elif isinstance(value, dict):
+                        stack.append(value)
+                else:
+                    # Regular field name
+                    fields.add(key)
         
         return fields
     
@@ -185,6 +360,27 @@ class MongoDBClient:
         
         self.database_name = database_name
         self.database = self.client[database_name]
+        self._known_fields.clear()
+    
+    def _get_read_collection(self, collection_name: str):
+        """Get the collection to use for read-only operations
+        
+        With the default 'primary' read preference this is the plain collection, so
+        reads always see the session's own writes. Other preferences use a cached
+        view that routes reads accordingly with a 'local' read concern.
+        """
+        if self.read_preference == 'primary':
+            return self.database[collection_name]
+        
+        cache_key = (self.database_name, collection_name)
+        collection = self._read_collection_cache.get(cache_key)
+        if collection is None:
+            collection = self.database[collection_name].with_options(
+                read_preference=_READ_PREFERENCES[self.read_preference],
+                read_concern=ReadConcern('local')
+            )
+            self._read_collection_cache[cache_key] = collection
+        return collection
     
     def get_collections(self) -> List[str]:
         """Get list of collections in current database"""
@@ -197,8 +393,14 @@ class MongoDBClient:
         """Get list of databases"""
         return [db['name'] for db in self.client.list_databases()]
     
-    def execute_query(self, mql_query: Dict[str, Any]) -> Any:
-        """Execute a MongoDB query"""
+    def execute_query(self, mql_query: Dict[str, Any], stream: bool = False) -> Any:
+        """Execute a MongoDB query
+        
+        With stream=True, find and aggregate return a generator over the cursor instead
+        of a list, so documents are only held one server batch at a time. The next batch
+        is requested when the caller reaches the end of the current one; errors raised
+        while iterating are translated the same way as errors raised here.
+        """
         operation = mql_query.get('operation')
         
         # Handle operations that don't require a database selection
@@ -236,7 +438,14 @@ class MongoDBClient:
         # Validate fields before executing any query
         self._validate_query_fields(mql_query, collection_name)
         
-        collection = self.database[collection_name]
+        if operation in _READ_OPERATIONS:
+            collection = self._get_read_collection(collection_name)
+        else:
+            collection = self.database[collection_name]
+            # A query may override the connection's write concern, e.g. {'w': 1, 'j': True}
+            write_concern = mql_query.get('write_concern')
+            if write_concern:
+                collection = collection.with_options(write_concern=WriteConcern(**write_concern))
         
         try:
             if operation == 'find':
@@ -247,33 +456,27 @@ class MongoDBClient:
                 skip = mql_query.get('skip')
                 
                 # Exclude _id by default unless specifically requested
+                # (build a copy so the caller's translated query is left untouched)
                 if projection is None:
-                    projection = {'_id': 0}
+                    projection = self._DEFAULT_PROJECTION
                 elif isinstance(projection, dict) and '_id' not in projection:
-                    projection['_id'] = 0
-                
-                cursor = collection.find(filter_doc, projection)
+                    projection = {**projection, '_id': 0}
                 
+                # Pass all cursor modifiers to find() in one call
+                find_options = {'no_cursor_timeout': False, 'batch_size': 1000}
                 if sort:
                     # Use collation to match MariaDB's utf8mb4_unicode_ci behavior
                     # This ensures case-insensitive sorting like MariaDB
-                    collation = {
-                        'locale': 'en',
-                        'caseLevel': False,  # Case-insensitive like utf8mb4_unicode_ci
-                        'strength': 1,       # Primary level only (ignore case, accents)
-                        'numericOrdering': False
-                    }
-                    cursor = cursor.sort(sort).collation(collation)
-                else:
-                    # No sorting, just apply collation if available
-                    pass
-                    
+                    find_options['sort'] = sort
+                    find_options['collation'] = self._MARIADB_COLLATION
                 if skip:
-                    cursor = cursor.skip(skip)
+                    find_options['skip'] = skip
                 if limit:
-                    cursor = cursor.limit(limit)
+                    find_options['limit'] = limit
+                
+                cursor = collection.find(filter_doc, projection, **find_options)
                 
-                return list(cursor)
+                return self._stream_results(cursor, collection_name) if stream else list(cursor)
             
             elif operation == 'insert_one':
                 document = mql_query.get('document')
@@ -282,7 +485,13 @@ class MongoDBClient:
             
             elif operation == 'insert_many':
                 documents = mql_query.get('documents')
-                result = collection.insert_many(documents)
+                # Unordered inserts let the server apply the batch in parallel and keep
+                # going past a failed document; failures surface as BulkWriteError
+                result = collection.insert_many(
+                    documents,
+                    ordered=mql_query.get('ordered', False),
+                    bypass_document_validation=mql_query.get('bypass_document_validation', False)
+                )
                 return {'inserted_ids': [str(id) for id in result.inserted_ids], 
                        'acknowledged': result.acknowledged}
             
@@ -316,6 +525,10 @@ class MongoDBClient:
             
             elif operation == 'count':
                 filter_doc = mql_query.get('filter', {})
+                if not filter_doc:
+                    # Unfiltered COUNT(*) reads the collection metadata instead of scanning;
+                    # the figure can briefly lag after unclean shutdowns or chunk migrations
+                    return collection.estimated_document_count()
                 return collection.count_documents(filter_doc)
             
             elif operation == 'aggregate':
@@ -323,20 +536,15 @@ class MongoDBClient:
                 
                 # Add collation for aggregation pipelines with $sort stages
                 # to match MariaDB's utf8mb4_unicode_ci behavior
-                collation = {
-                    'locale': 'en',
-                    'caseLevel': False,  # Case-insensitive like utf8mb4_unicode_ci  
-                    'strength': 1,       # Primary level only (ignore case, accents)
-                    'numericOrdering': False
-                }
-                
                 # Check if pipeline contains $sort stages
                 has_sort = any('$sort' in stage for stage in pipeline if isinstance(stage, dict))
                 
                 if has_sort:
-                    return list(collection.aggregate(pipeline, collation=collation))
+                    cursor = collection.aggregate(pipeline, collation=self._MARIADB_COLLATION, batchSize=1000)
                 else:
-                    return list(collection.aggregate(pipeline))
+                    cursor = collection.aggregate(pipeline, batchSize=1000)
+                
+                return self._stream_results(cursor, collection_name) if stream else list(cursor)
             
             elif operation == 'distinct':
                 field = mql_query.get('field')
@@ -348,27 +556,52 @@ class MongoDBClient:
             else:
                 raise Exception(f"Unsupported operation: {operation}")
                 
-        except OperationFailure as e:
+        except Exception as e:
+            raise self._translate_query_error(e, collection_name)
+    
+    def _translate_query_error(self, error: Exception, collection_name: str) -> Exception:
+        """Translate a MongoDB error raised while running a query into its MySQL equivalent"""
+        if isinstance(error, BulkWriteError):
+            # Report the first failed document of a bulk insert, as MySQL does. Unordered
+            # inserts keep going past failures, so also say how many rows did go in
+            write_errors = error.details.get('writeErrors', [])
+            first_error = write_errors[0] if write_errors else {}
+            inserted = f" ({error.details.get('nInserted', 0)} rows inserted)"
+            if first_error.get('code') == 11000:  # DuplicateKey
+                key_pattern = first_error.get('keyPattern', {})
+                key_name = 'PRIMARY' if '_id' in key_pattern else next(iter(key_pattern), 'PRIMARY')
+                entry = '-'.join(str(value) for value in first_error.get('keyValue', {}).values())
+                return Exception(f"ERROR 1062 (23000): Duplicate entry '{entry}' for key '{key_name}'{inserted}")
+            return Exception(f"ERROR 1064 (42000): You have an error in your SQL syntax{inserted}")
+        
+        if isinstance(error, OperationFailure):
             # Translate MongoDB errors to MySQL equivalents
-            if e.code == 26:  # NamespaceNotFound
-                raise Exception(f"ERROR 1146 (42S02): Table '{collection_name}' doesn't exist")
-            elif e.code == 18:  # AuthenticationFailed
-                raise Exception(f"ERROR 1045 (28000): Access denied")
-            elif e.code == 13:  # Unauthorized
-                raise Exception(f"ERROR 1142 (42000): SELECT command denied")
+            if error.code == 26:  # NamespaceNotFound
+                return Exception(f"ERROR 1146 (42S02): Table '{collection_name}' doesn't exist")
+            elif error.code == 18:  # AuthenticationFailed
+                return Exception(f"ERROR 1045 (28000): Access denied")
+            elif error.code == 13:  # Unauthorized
+                return Exception(f"ERROR 1142 (42000): SELECT command denied")
             else:
                 # Generic database error
-                raise Exception(f"ERROR 1064 (42000): You have an error in your SQL syntax")
+                return Exception(f"ERROR 1064 (42000): You have an error in your SQL syntax")
+        
+        error_msg = str(error).lower()
+        if 'collection' in error_msg and 'not found' in error_msg:
+            return Exception(f"ERROR 1146 (42S02): Table '{collection_name}' doesn't exist")
+        elif 'timeout' in error_msg:
+            return Exception(f"ERROR 2006 (HY000): MySQL server has gone away")
+        else:
+            # Generic error
+            return Exception(f"ERROR 1064 (42000): You have an error in your SQL syntax")
+    
+    def _stream_results(self, cursor, collection_name: str):
+        """Yield documents from a cursor, translating errors raised mid-iteration like execute_query"""
+        try:
+            yield from cursor
         except Exception as e:
-            error_msg = str(e).lower()
-            if 'collection' in error_msg and 'not found' in error_msg:
-                raise Exception(f"ERROR 1146 (42S02): Table '{collection_name}' doesn't exist")
-            elif 'timeout' in error_msg:
-                raise Exception(f"ERROR 2006 (HY000): MySQL server has gone away")
-            else:
-                # Generic error
-                raise Exception(f"ERROR 1064 (42000): You have an error in your SQL syntax")
-
+            raise self._translate_query_error(e, collection_name)
+    
     def _handle_eval_query(self, mql_query: Dict[str, Any]) -> List[Dict[str, Any]]:
         """Handle evaluation queries that don't require a collection (e.g., SELECT 1+1, SELECT NOW())"""
         projection = mql_query.get('projection', {})
@@ -392,912 +625,802 @@ class MongoDBClient:
     
     def _evaluate_expression(self, expression: Dict[str, Any]) -> Any:
         """Evaluate MongoDB expressions for no-table queries"""
+        for operator_name, operand in expression.items():
+            handler = self.expression_handlers.get(operator_name)
+            if handler is not None:
+                return handler(operand)
         
-        if '$dateToString' in expression:
-            # Format date as string
-            date_expr = expression['$dateToString']
-            if isinstance(date_expr, dict):
-                date_part = date_expr.get('date')
-                format_str = date_expr.get('format', '%Y-%m-%d')
-                
-                # Handle nested expressions or direct dateFromString
-                if isinstance(date_part, dict):
-                    # Check if it's a direct $dateFromString
-                    if '$dateFromString' in date_part:
-                        date_string = date_part['$dateFromString']['dateString']
+        # Default: return the expression as-is
+        return str(expression)
+    
+    def _eval_date_to_string(self, date_expr: Any) -> Any:
+        """Format date as string"""
+        if isinstance(date_expr, dict):
+            date_part = date_expr.get('date')
+            format_str = date_expr.get('format', '%Y-%m-%d')
+            
+            # Handle nested expressions or direct dateFromString
+            if isinstance(date_part, dict):
+                # Check if it's a direct $dateFromString
+                if '$dateFromString' in date_part:
+                    date_string = date_part['$dateFromString']['dateString']
+                else:
+                    # Recursively evaluate nested expression (like $dateAdd, $dateFromParts, etc.)
+                    evaluated_date = self._evaluate_expression(date_part)
+                    if evaluated_date:
+                        date_string = str(evaluated_date)
                     else:
-                        # Recursively evaluate nested expression (like $dateAdd, $dateFromParts, etc.)
-                        evaluated_date = self._evaluate_expression(date_part)
-                        if evaluated_date:
-                            date_string = str(evaluated_date)
-                        else:
-                            return None
-                    
-                    from datetime import datetime
-                    try:
-                        # Try different date formats
-                        for fmt in ['%Y-%m-%d %H:%M:%S', '%Y-%m-%d', '%H:%M:%S']:
-                            try:
-                                date_obj = datetime.strptime(date_string, fmt)
-                                break
-                            except:
-                                continue
-                        else:
-                            return None
-                        
-                        # Convert MongoDB format to Python format
-                        python_format = format_str.replace('%Y', '%Y').replace('%m', '%m').replace('%d', '%d')
-                        return date_obj.strftime(python_format)
-                    except:
                         return None
-            return str(date_expr)
-        
-        elif '$hour' in expression:
-            # Extract hour from time/datetime string
-            date_expr = expression['$hour']
-            if isinstance(date_expr, dict) and '$dateFromString' in date_expr:
-                date_string = date_expr['$dateFromString']['dateString']
-                from datetime import datetime
-                try:
-                    # Try different date formats that include time
-                    for fmt in ['%Y-%m-%dT%H:%M:%S', '%Y-%m-%d %H:%M:%S', '%H:%M:%S']:
-                        try:
-                            date_obj = datetime.strptime(date_string, fmt)
-                            return date_obj.hour
-                        except:
-                            continue
-                    return None
-                except:
-                    return None
-            return None
-        
-        elif '$minute' in expression:
-            # Extract minute from time/datetime string
-            date_expr = expression['$minute']
-            if isinstance(date_expr, dict) and '$dateFromString' in date_expr:
-                date_string = date_expr['$dateFromString']['dateString']
-                from datetime import datetime
-                try:
-                    # Try different date formats that include time
-                    for fmt in ['%Y-%m-%dT%H:%M:%S', '%Y-%m-%d %H:%M:%S', '%H:%M:%S']:
-                        try:
-                            date_obj = datetime.strptime(date_string, fmt)
-                            return date_obj.minute
-                        except:
-                            continue
-                    return None
-                except:
-                    return None
-            return None
-        
-        elif '$second' in expression:
-            # Extract second from time/datetime string
-            date_expr = expression['$second']
-            if isinstance(date_expr, dict) and '$dateFromString' in date_expr:
-                date_string = date_expr['$dateFromString']['dateString']
-                from datetime import datetime
-                try:
-                    # Try different date formats that include time
-                    for fmt in ['%Y-%m-%dT%H:%M:%S', '%Y-%m-%d %H:%M:%S', '%H:%M:%S']:
-                        try:
-                            date_obj = datetime.strptime(date_string, fmt)
-                            return date_obj.second
-                        except:
-                            continue
-                    return None
-                except:
-                    return None
-            return None
-        
-        elif '$add' in expression:
-            # Addition
-            values = expression['$add']
-            if isinstance(values, list):
-                try:
-                    result = 0
-                    for val in values:
-                        if isinstance(val, dict):
-                            # Recursively evaluate nested expressions
-                            val = self._evaluate_expression(val)
-                        result += float(val) if val is not None else 0
-                    # Preserve integer type if all inputs were integers
-                    if all(isinstance(v, int) or (isinstance(v, dict) and isinstance(self._evaluate_expression(v), int)) for v in values):
-                        return int(result)
-                    return result
-                except:
-                    return None
-            return float(values) if values is not None else None
-        
-        elif '$cond' in expression:
-            # Conditional expression (if-then-else)
-            cond_expr = expression['$cond']
-            if isinstance(cond_expr, dict):
-                if_expr = cond_expr.get('if')
-                then_expr = cond_expr.get('then')
-                else_expr = cond_expr.get('else')
-                
-                # Evaluate the condition
-                if isinstance(if_expr, dict):
-                    condition_result = self._evaluate_expression(if_expr)
-                else:
-                    condition_result = bool(if_expr)
-                
-                # Return then or else based on condition
-                if condition_result:
-                    if isinstance(then_expr, dict):
-                        return self._evaluate_expression(then_expr)
-                    return then_expr
-                else:
-                    if isinstance(else_expr, dict):
-                        return self._evaluate_expression(else_expr)
-                    return else_expr
-            return None
-        
-        elif '$gte' in expression:
-            # Greater than or equal comparison
-            values = expression['$gte']
-            if isinstance(values, list) and len(values) >= 2:
-                left, right = values[0], values[1]
-                
-                # Evaluate nested expressions
-                if isinstance(left, dict):
-                    left = self._evaluate_expression(left)
-                if isinstance(right, dict):
-                    right = self._evaluate_expression(right)
                 
                 try:
-                    return float(left) >= float(right)
-                except:
-                    return str(left) >= str(right)
-            return False
-        
-        elif '$subtract' in expression:
-            # Subtraction
-            values = expression['$subtract']
-            if isinstance(values, list) and len(values) >= 2:
-                try:
-                    # Evaluate the first value
-                    first_val = values[0]
-                    if isinstance(first_val, dict):
-                        first_val = self._evaluate_expression(first_val)
-                    result = float(first_val)
-                    
-                    # Subtract the remaining values
-                    for val in values[1:]:
-                        if isinstance(val, dict):
-                            # Recursively evaluate nested expressions
-                            val = self._evaluate_expression(val)
-                        result -= float(val) if val is not None else 0
+                    date_obj = _parse_date(date_string, _DATE_FORMATS)
+                    if date_obj is None:
+                        return None
                     
-                    # Preserve integer type if result is a whole number
-                    if result == int(result):
-                        return int(result)
-                    return result
-                except:
+                    # Convert MongoDB format to Python format
+                    python_format = format_str.replace('%Y', '%Y').replace('%m', '%m').replace('%d', '%d')
+                    return date_obj.strftime(python_format)
+                except _EVALUATION_ERRORS:
                     return None
-            return None
-        
-        elif '$toInt' in expression:
-            # Convert to integer
-            value = expression['$toInt']
-            if isinstance(value, dict):
-                value = self._evaluate_expression(value)
+        return str(date_expr)
+    
+    def _eval_hour(self, date_expr: Any) -> Any:
+        """Extract hour from time/datetime string"""
+        if isinstance(date_expr, dict) and '$dateFromString' in date_expr:
+            date_string = date_expr['$dateFromString']['dateString']
             try:
-                return int(float(value))
-            except:
+                date_obj = _parse_date(date_string, _TIME_FORMATS)
+            except TypeError:
+                # Unhashable dateString - not a parseable literal
                 return None
-        
-        elif '$divide' in expression:
-            # Division
-            values = expression['$divide']
-            if isinstance(values, list) and len(values) >= 2:
-                try:
-                    dividend = values[0]
-                    divisor = values[1]
-                    if isinstance(dividend, dict):
-                        dividend = self._evaluate_expression(dividend)
-                    if isinstance(divisor, dict):
-                        divisor = self._evaluate_expression(divisor)
-                    return float(dividend) / float(divisor)
-                except:
-                    return None
-            return None
-        
-        elif '$abs' in expression:
-            # Absolute value
-            value = expression['$abs']
+            return date_obj.hour if date_obj else None
+        return None
+    
+    def _eval_minute(self, date_expr: Any) -> Any:
+        """Extract minute from time/datetime string"""
+        if isinstance(date_expr, dict) and '$dateFromString' in date_expr:
+            date_string = date_expr['$dateFromString']['dateString']
             try:
-                # Preserve integer type if the input is an integer
-                if isinstance(value, int):
-                    return abs(value)
-                else:
-                    return abs(float(value))
-            except:
+                date_obj = _parse_date(date_string, _TIME_FORMATS)
+            except TypeError:
+                # Unhashable dateString - not a parseable literal
                 return None
-        
-        elif '$toUpper' in expression:
-            # Convert to uppercase
-            value = expression['$toUpper']
-            if isinstance(value, str):
-                return value.upper()
-            return value
-        
-        elif '$toLower' in expression:
-            # Convert to lowercase
-            value = expression['$toLower']
-            if isinstance(value, str):
-                return value.lower()
-            return value
-        
-        elif '$concat' in expression:
-            # String concatenation
-            values = expression['$concat']
-            if isinstance(values, list):
-                return ''.join(str(v) for v in values)
-            return str(values)
-        
-        elif '$strLenCP' in expression:
-            # String length
-            value = expression['$strLenCP']
-            return len(str(value))
-        
-        elif '$substr' in expression:
-            # Substring
-            values = expression['$substr']
-            if isinstance(values, list) and len(values) >= 3:
-                string, start, length = values[0], values[1], values[2]
-                
-                # Evaluate any nested expressions
-                if isinstance(string, dict):
-                    string = self._evaluate_expression(string)
-                if isinstance(start, dict):
-                    start = self._evaluate_expression(start)
-                if isinstance(length, dict):
-                    length = self._evaluate_expression(length)
-                
-                # Convert to proper types
-                string = str(string)
-                start = int(start) if start is not None else 0
-                length = int(length) if length is not None else len(string)
-                
-                # Ensure start is not negative and doesn't exceed string length
-                start = max(0, min(start, len(string)))
-                length = max(0, length)
-                
-                return string[start:start+length]
-            return str(values)
-        
-        elif '$trim' in expression:
-            # Trim whitespace
-            value = expression['$trim']
-            return str(value).strip()
-        
-        elif '$replaceAll' in expression:
-            # Replace all occurrences
-            values = expression['$replaceAll']
-            if isinstance(values, list) and len(values) >= 3:
-                string, find, replace = values[0], values[1], values[2]
-                return str(string).replace(str(find), str(replace))
-            return str(values)
-        
-        elif '$reverse' in expression:
-            # Reverse string
-            value = expression['$reverse']
-            return str(value)[::-1]
-        
-        elif '$round' in expression:
-            # Round to decimal places
-            values = expression['$round']
-            if isinstance(values, list) and len(values) >= 2:
-                number, precision = values[0], values[1]
-                return round(float(number), int(precision))
-            else:
-                return round(float(values))
-        
-        elif '$ceil' in expression:
-            # Ceiling
-            value = expression['$ceil']
-            import math
-            return math.ceil(float(value))
-        
-        elif '$floor' in expression:
-            # Floor
-            value = expression['$floor']
-            import math
-            return math.floor(float(value))
-        
-        elif '$sqrt' in expression:
-            # Square root
-            value = expression['$sqrt']
-            import math
-            return math.sqrt(float(value))
-        
-        elif '$pow' in expression:
-            # Power
-            values = expression['$pow']
-            if isinstance(values, list) and len(values) >= 2:
-                base, exponent = values[0], values[1]
-                return pow(float(base), float(exponent))
-            return float(values)
-        
-        elif '$sin' in expression:
-            # Sine
-            value = expression['$sin']
-            if isinstance(value, dict):
-                value = self._evaluate_expression(value)
-            import math
-            return math.sin(float(value))
-        
-        elif '$cos' in expression:
-            # Cosine
-            value = expression['$cos']
-            if isinstance(value, dict):
-                value = self._evaluate_expression(value)
-            import math
-            return math.cos(float(value))
-        
-        elif '$ln' in expression:
-            # Natural logarithm
-            value = expression['$ln']
-            import math
-            return math.log(float(value))
-        
-        elif '$max' in expression:
-            # Maximum value
-            values = expression['$max']
-            if isinstance(values, list):
-                return max(float(v) for v in values)
-            return float(values)
-        
-        elif '$dateFromParts' in expression:
-            # Date from parts
-            parts = expression['$dateFromParts']
-            from datetime import datetime
+            return date_obj.minute if date_obj else None
+        return None
+    
+    def _eval_second(self, date_expr: Any) -> Any:
+        """Extract second from time/datetime string"""
+        if isinstance(date_expr, dict) and '$dateFromString' in date_expr:
+            date_string = date_expr['$dateFromString']['dateString']
             try:
-                year = parts.get('year', 1970)
-                month = parts.get('month', 1)
-                day = parts.get('day', 1)
-                hour = parts.get('hour', 0)
-                minute = parts.get('minute', 0)
-                second = parts.get('second', 0)
-                
-                # Recursively evaluate if parts are expressions
-                if isinstance(year, dict):
-                    year = self._evaluate_expression(year)
-                if isinstance(month, dict):
-                    month = self._evaluate_expression(month)
-                if isinstance(day, dict):
-                    day = self._evaluate_expression(day)
-                if isinstance(hour, dict):
-                    hour = self._evaluate_expression(hour)
-                if isinstance(minute, dict):
-                    minute = self._evaluate_expression(minute)
-                if isinstance(second, dict):
-                    second = self._evaluate_expression(second)
-                
-                date_obj = datetime(int(year), int(month), int(day), int(hour), int(minute), int(second))
-                
-                # If only time components are significant (year=1970, month=1, day=1), return time format
-                if int(year) == 1970 and int(month) == 1 and int(day) == 1:
-                    return date_obj.strftime('%H:%M:%S')
-                else:
-                    return date_obj.strftime('%Y-%m-%d %H:%M:%S')
-            except Exception as e:
+                date_obj = _parse_date(date_string, _TIME_FORMATS)
+            except TypeError:
+                # Unhashable dateString - not a parseable literal
                 return None
-        
-        elif '$dateAdd' in expression:
-            # Date add
-            add_parts = expression['$dateAdd']
-            from datetime import datetime, timedelta
+            return date_obj.second if date_obj else None
+        return None
+    
+    def _eval_add(self, values: Any) -> Any:
+        """Addition"""
+        if isinstance(values, list):
             try:
-                start_date = add_parts.get('startDate')
-                unit = add_parts.get('unit', 'day')
-                amount = add_parts.get('amount', 0)
-                
-                # Recursively evaluate start date if it's an expression
-                if isinstance(start_date, dict):
-                    start_date = self._evaluate_expression(start_date)
-                
-                # Parse start date
-                if isinstance(start_date, str):
-                    # Try different date formats
-                    date_obj = None
-                    for fmt in ['%Y-%m-%d %H:%M:%S', '%Y-%m-%d', '%H:%M:%S']:
-                        try:
-                            date_obj = datetime.strptime(start_date, fmt)
-                            break
-                        except:
-                            continue
-                    
-                    if not date_obj:
-                        return None
-                else:
-                    return None
-                
-                # Add based on unit
-                if unit in ['day', 'days']:
-                    date_obj += timedelta(days=int(amount))
-                elif unit in ['hour', 'hours']:
-                    date_obj += timedelta(hours=int(amount))
-                elif unit in ['minute', 'minutes']:
-                    date_obj += timedelta(minutes=int(amount))
-                elif unit in ['second', 'seconds']:
-                    date_obj += timedelta(seconds=int(amount))
-                elif unit in ['millisecond', 'milliseconds']:
-                    date_obj += timedelta(milliseconds=int(amount))
-                elif unit in ['week', 'weeks']:
-                    date_obj += timedelta(weeks=int(amount))
-                elif unit in ['month', 'months']:
-                    # Proper month addition
-                    year = date_obj.year
-                    month = date_obj.month + int(amount)
-                    day = date_obj.day
-                    
-                    # Handle month overflow
-                    while month > 12:
-                        year += 1
-                        month -= 12
-                    while month < 1:
-                        year -= 1
-                        month += 12
-                    
-                    # Handle day overflow for shorter months
-                    import calendar
-                    max_day = calendar.monthrange(year, month)[1]
-                    if day > max_day:
-                        day = max_day
-                    
-                    date_obj = date_obj.replace(year=year, month=month, day=day)
-                elif unit in ['year', 'years']:
-                    # Proper year addition
-                    year = date_obj.year + int(amount)
-                    date_obj = date_obj.replace(year=year)
-                elif unit in ['quarter', 'quarters']:
-                    # Quarter is 3 months
-                    year = date_obj.year
-                    month = date_obj.month + (int(amount) * 3)
-                    day = date_obj.day
-                    
-                    # Handle month overflow
-                    while month > 12:
-                        year += 1
-                        month -= 12
-                    while month < 1:
-                        year -= 1
-                        month += 12
-                    
-                    # Handle day overflow for shorter months
-                    import calendar
-                    max_day = calendar.monthrange(year, month)[1]
-                    if day > max_day:
-                        day = max_day
-                    
-                    date_obj = date_obj.replace(year=year, month=month, day=day)
-                
-                # Return appropriate format
-                if unit in ['hour', 'hours', 'minute', 'minutes', 'second', 'seconds', 'millisecond', 'milliseconds']:
-                    return date_obj.strftime('%Y-%m-%d %H:%M:%S')
-                else:
-                    return date_obj.strftime('%Y-%m-%d')
-            except Exception as e:
+                result = 0
+                # Track whether every (evaluated) input is an integer while summing,
+                # so nested expressions are only evaluated once
+                all_int = True
+                for val in values:
+                    if isinstance(val, dict):
+                        # Recursively evaluate nested expressions
+                        val = self._evaluate_expression(val)
+                    if not isinstance(val, int):
+                        all_int = False
+                    result += float(val) if val is not None else 0
+                # Preserve integer type if all inputs were integers
+                if all_int:
+                    return int(result)
+                return result
+            except _EVALUATION_ERRORS:
                 return None
-        
-        elif '$dateSubtract' in expression:
-            # Date subtract
-            sub_parts = expression['$dateSubtract']
-            from datetime import datetime, timedelta
+        return float(values) if values is not None else None
+    
+    def _eval_cond(self, cond_expr: Any) -> Any:
+        """Conditional expression (if-then-else)"""
+        if isinstance(cond_expr, dict):
+            if_expr = cond_expr.get('if')
+            then_expr = cond_expr.get('then')
+            else_expr = cond_expr.get('else')
+            
+            # Evaluate the condition
+            if isinstance(if_expr, dict):
+                condition_result = self._evaluate_expression(if_expr)
+            else:
+                condition_result = bool(if_expr)
+            
+            # Return then or else based on condition
+            if condition_result:
+                if isinstance(then_expr, dict):
+                    return self._evaluate_expression(then_expr)
+                return then_expr
+            else:
+                if isinstance(else_expr, dict):
+                    return self._evaluate_expression(else_expr)
+                return else_expr
+        return None
+    
+    def _eval_gte(self, values: Any) -> Any:
+        """Greater than or equal comparison"""
+        if isinstance(values, list) and len(values) >= 2:
+            left, right = values[0], values[1]
+            
+            # Evaluate nested expressions
+            if isinstance(left, dict):
+                left = self._evaluate_expression(left)
+            if isinstance(right, dict):
+                right = self._evaluate_expression(right)
+            
             try:
-                start_date = sub_parts.get('startDate')
-                unit = sub_parts.get('unit', 'day')
-                amount = sub_parts.get('amount', 0)
-                
-                # Recursively evaluate start date if it's an expression
-                if isinstance(start_date, dict):
-                    start_date = self._evaluate_expression(start_date)
-                
-                # Parse start date
-                if isinstance(start_date, str):
-                    # Try different date formats
-                    date_obj = None
-                    for fmt in ['%Y-%m-%d %H:%M:%S', '%Y-%m-%d', '%H:%M:%S']:
-                        try:
-                            date_obj = datetime.strptime(start_date, fmt)
-                            break
-                        except:
-                            continue
-                    
-                    if not date_obj:
-                        return None
-                else:
-                    return None
+                return float(left) >= float(right)
+            except _EVALUATION_ERRORS:
+                return str(left) >= str(right)
+        return False
+    
+    def _eval_subtract(self, values: Any) -> Any:
+        """Subtraction"""
+        if isinstance(values, list) and len(values) >= 2:
+            try:
+                # Evaluate the first value
+                first_val = values[0]
+                if isinstance(first_val, dict):
+                    first_val = self._evaluate_expression(first_val)
+                result = float(first_val)
                 
-                # Subtract based on unit  
-                if unit in ['day', 'days']:
-                    date_obj -= timedelta(days=int(amount))
-                elif unit in ['hour', 'hours']:
-                    date_obj -= timedelta(hours=int(amount))
-                elif unit in ['minute', 'minutes']:
-                    date_obj -= timedelta(minutes=int(amount))
-                elif unit in ['second', 'seconds']:
-                    date_obj -= timedelta(seconds=int(amount))
-                elif unit in ['millisecond', 'milliseconds']:
-                    date_obj -= timedelta(milliseconds=int(amount))
-                elif unit in ['week', 'weeks']:
-                    date_obj -= timedelta(weeks=int(amount))
-                elif unit in ['month', 'months']:
-                    # Proper month subtraction
-                    year = date_obj.year
-                    month = date_obj.month - int(amount)
-                    day = date_obj.day
-                    
-                    # Handle month underflow
-                    while month < 1:
-                        year -= 1
-                        month += 12
-                    while month > 12:
-                        year += 1
-                        month -= 12
-                    
-                    # Handle day overflow for shorter months
-                    import calendar
-                    max_day = calendar.monthrange(year, month)[1]
-                    if day > max_day:
-                        day = max_day
-                    
-                    date_obj = date_obj.replace(year=year, month=month, day=day)
-                elif unit in ['year', 'years']:
-                    # Proper year subtraction
-                    year = date_obj.year - int(amount)
-                    date_obj = date_obj.replace(year=year)
-                elif unit in ['quarter', 'quarters']:
-                    # Quarter is 3 months
-                    year = date_obj.year
-                    month = date_obj.month - (int(amount) * 3)
-                    day = date_obj.day
-                    
-                    # Handle month underflow
-                    while month < 1:
-                        year -= 1
-                        month += 12
-                    while month > 12:
-                        year += 1
-                        month -= 12
-                    
-                    # Handle day overflow for shorter months
-                    import calendar
-                    max_day = calendar.monthrange(year, month)[1]
-                    if day > max_day:
-                        day = max_day
-                    
-                    date_obj = date_obj.replace(year=year, month=month, day=day)
+                # Subtract the remaining values
+                for val in values[1:]:
+                    if isinstance(val, dict):
+                        # Recursively evaluate nested expressions
+                        val = self._evaluate_expression(val)
+                    result -= float(val) if val is not None else 0
                 
-                # Return appropriate format
-                if unit in ['hour', 'hours', 'minute', 'minutes', 'second', 'seconds', 'millisecond', 'milliseconds']:
-                    return date_obj.strftime('%Y-%m-%d %H:%M:%S')
-                else:
-                    return date_obj.strftime('%Y-%m-%d')
-            except Exception as e:
+                # Preserve integer type if result is a whole number
+                if result == int(result):
+                    return int(result)
+                return result
+            except _EVALUATION_ERRORS:
                 return None
-        
-        elif '$dateFromString' in expression:
-            # Parse date from string
-            date_expr = expression['$dateFromString']
-            if isinstance(date_expr, dict):
-                date_string = date_expr.get('dateString', '')
-                # Simply return the date string as-is since it's already in the right format
-                return str(date_string).strip("'\"")
+        return None
+    
+    def _eval_to_int(self, value: Any) -> Any:
+        """Convert to integer"""
+        if isinstance(value, dict):
+            value = self._evaluate_expression(value)
+        try:
+            return int(float(value))
+        except _EVALUATION_ERRORS:
             return None
-        
-        elif '$year' in expression:
-            # Extract year
-            date_expr = expression['$year']
-            from datetime import datetime
+    
+    def _eval_divide(self, values: Any) -> Any:
+        """Division"""
+        if isinstance(values, list) and len(values) >= 2:
             try:
-                if isinstance(date_expr, str):
-                    date_obj = datetime.strptime(date_expr, '%Y-%m-%d')
-                    return date_obj.year
-                elif isinstance(date_expr, dict) and '$dateFromString' in date_expr:
-                    date_string = date_expr['$dateFromString']['dateString']
-                    date_obj = datetime.strptime(date_string, '%Y-%m-%d')
-                    return date_obj.year
-            except:
-                pass
+                dividend = values[0]
+                divisor = values[1]
+                if isinstance(dividend, dict):
+                    dividend = self._evaluate_expression(dividend)
+                if isinstance(divisor, dict):
+                    divisor = self._evaluate_expression(divisor)
+                return float(dividend) / float(divisor)
+            except _EVALUATION_ERRORS:
+                return None
+        return None
+    
+    def _eval_abs(self, value: Any) -> Any:
+        """Absolute value"""
+        try:
+            # Preserve integer type if the input is an integer
+            if isinstance(value, int):
+                return abs(value)
+            else:
+                return abs(float(value))
+        except _EVALUATION_ERRORS:
             return None
-        
-        elif '$month' in expression:
-            # Extract month
-            date_expr = expression['$month']
-            from datetime import datetime
-            try:
-                if isinstance(date_expr, str):
-                    date_obj = datetime.strptime(date_expr, '%Y-%m-%d')
-                    return date_obj.month
-                elif isinstance(date_expr, dict) and '$dateFromString' in date_expr:
-                    date_string = date_expr['$dateFromString']['dateString']
-                    date_obj = datetime.strptime(date_string, '%Y-%m-%d')
-                    return date_obj.month
-            except:
-                pass
+    
+    def _eval_to_upper(self, value: Any) -> Any:
+        """Convert to uppercase"""
+        if isinstance(value, str):
+            return value.upper()
+        return value
+    
+    def _eval_to_lower(self, value: Any) -> Any:
+        """Convert to lowercase"""
+        if isinstance(value, str):
+            return value.lower()
+        return value
+    
+    def _eval_concat(self, values: Any) -> Any:
+        """String concatenation"""
+        if isinstance(values, list):
+            return ''.join(map(str, values))
+        return str(values)
+    
+    def _eval_str_len_cp(self, value: Any) -> Any:
+        """String length"""
+        return len(value if type(value) is str else str(value))
+    
+    def _eval_substr(self, values: Any) -> Any:
+        """Substring"""
+        if isinstance(values, list) and len(values) >= 3:
+            string, start, length = values[0], values[1], values[2]
+            
+            # Evaluate any nested expressions
+            if isinstance(string, dict):
+                string = self._evaluate_expression(string)
+            if isinstance(start, dict):
+                start = self._evaluate_expression(start)
+            if isinstance(length, dict):
+                length = self._evaluate_expression(length)
+            
+            # Convert to proper types
+            if type(string) is not str:
+                string = str(string)
+            start = int(start) if start is not None else 0
+            length = int(length) if length is not None else len(string)
+            
+            # Ensure start is not negative and doesn't exceed string length
+            start = max(0, min(start, len(string)))
+            length = max(0, length)
+            
+            return string[start:start+length]
+        return str(values)
+    
+    def _eval_trim(self, value: Any) -> Any:
+        """Trim whitespace"""
+        return (value if type(value) is str else str(value)).strip()
+    
+    def _eval_replace_all(self, values: Any) -> Any:
+        """Replace all occurrences"""
+        if isinstance(values, list) and len(values) >= 3:
+            string, find, replace = values[0], values[1], values[2]
+            return str(string).replace(str(find), str(replace))
+        return str(values)
+    
+    def _eval_reverse(self, value: Any) -> Any:
+        """Reverse string"""
+        return (value if type(value) is str else str(value))[::-1]
+    
+    def _eval_round(self, values: Any) -> Any:
+        """Round to decimal places"""
+        if isinstance(values, list) and len(values) >= 2:
+            number, precision = values[0], values[1]
+            return round(float(number), int(precision))
+        else:
+            return round(float(values))
+    
+    def _eval_ceil(self, value: Any) -> Any:
+        """Ceiling"""
+        return math.ceil(float(value))
+    
+    def _eval_floor(self, value: Any) -> Any:
+        """Floor"""
+        return math.floor(float(value))
+    
+    def _eval_sqrt(self, value: Any) -> Any:
+        """Square root"""
+        return math.sqrt(float(value))
+    
+    def _eval_pow(self, values: Any) -> Any:
+        """Power"""
+        if isinstance(values, list) and len(values) >= 2:
+            base, exponent = values[0], values[1]
+            return pow(float(base), float(exponent))
+        return float(values)
+    
+    def _eval_sin(self, value: Any) -> Any:
+        """Sine"""
+        if isinstance(value, dict):
+            value = self._evaluate_expression(value)
+        return math.sin(float(value))
+    
+    def _eval_cos(self, value: Any) -> Any:
+        """Cosine"""
+        if isinstance(value, dict):
+            value = self._evaluate_expression(value)
+        return math.cos(float(value))
+    
+    def _eval_ln(self, value: Any) -> Any:
+        """Natural logarithm"""
+        return math.log(float(value))
+    
+    def _eval_max(self, values: Any) -> Any:
+        """Maximum value"""
+        if isinstance(values, list):
+            return max(float(v) for v in values)
+        return float(values)
+    
+    def _eval_date_from_parts(self, parts: Any) -> Any:
+        """Date from parts"""
+        try:
+            year = parts.get('year', 1970)
+            month = parts.get('month', 1)
+            day = parts.get('day', 1)
+            hour = parts.get('hour', 0)
+            minute = parts.get('minute', 0)
+            second = parts.get('second', 0)
+            
+            # Recursively evaluate if parts are expressions
+            if isinstance(year, dict):
+                year = self._evaluate_expression(year)
+            if isinstance(month, dict):
+                month = self._evaluate_expression(month)
+            if isinstance(day, dict):
+                day = self._evaluate_expression(day)
+            if isinstance(hour, dict):
+                hour = self._evaluate_expression(hour)
+            if isinstance(minute, dict):
+                minute = self._evaluate_expression(minute)
+            if isinstance(second, dict):
+                second = self._evaluate_expression(second)
+            
+            date_obj = datetime(int(year), int(month), int(day), int(hour), int(minute), int(second))
+            
+            # If only time components are significant (year=1970, month=1, day=1), return time format
+            if int(year) == 1970 and int(month) == 1 and int(day) == 1:
+                return date_obj.strftime('%H:%M:%S')
+            else:
+                return date_obj.strftime('%Y-%m-%d %H:%M:%S')
+        except Exception as e:
             return None
-        
-        elif '$toDays' in expression:
-            # Custom TO_DAYS implementation
-            date_expr = expression['$toDays']
-            from datetime import datetime
-            try:
-                if isinstance(date_expr, dict) and '$dateFromString' in date_expr:
-                    date_string = date_expr['$dateFromString']['dateString']
-                else:
-                    date_string = str(date_expr).strip("'\"")
-                
-                # Parse the date
-                date_obj = None
-                for fmt in ['%Y-%m-%d %H:%M:%S', '%Y-%m-%d', '%H:%M:%S']:
-                    try:
-                        date_obj = datetime.strptime(date_string, fmt)
-                        break
-                    except:
-                        continue
+    
+    def _eval_date_add(self, add_parts: Any) -> Any:
+        """Date add"""
+        try:
+            start_date = add_parts.get('startDate')
+            unit = add_parts.get('unit', 'day')
+            amount = add_parts.get('amount', 0)
+            
+            # Recursively evaluate start date if it's an expression
+            if isinstance(start_date, dict):
+                start_date = self._evaluate_expression(start_date)
+            
+            # Parse start date
+            if isinstance(start_date, str):
+                date_obj = _parse_date(start_date, _DATE_FORMATS)
                 
                 if not date_obj:
                     return None
-                
-                # Calculate days since year 0000-01-01 (MariaDB epoch)
-                # This is the algorithm used by MariaDB
+            else:
+                return None
+            
+            # Add based on unit
+            if unit in ['day', 'days']:
+                date_obj += timedelta(days=int(amount))
+            elif unit in ['hour', 'hours']:
+                date_obj += timedelta(hours=int(amount))
+            elif unit in ['minute', 'minutes']:
+                date_obj += timedelta(minutes=int(amount))
+            elif unit in ['second', 'seconds']:
+                date_obj += timedelta(seconds=int(amount))
+            elif unit in ['millisecond', 'milliseconds']:
+                date_obj += timedelta(milliseconds=int(amount))
+            elif unit in ['week', 'weeks']:
+                date_obj += timedelta(weeks=int(amount))
+            elif unit in ['month', 'months']:
+                # Proper month addition
                 year = date_obj.year
-                month = date_obj.month
+                month = date_obj.month + int(amount)
                 day = date_obj.day
                 
-                # MariaDB TO_DAYS calculation
-                if year < 1 or year > 9999:
-                    return None
+                # Handle month overflow
+                while month > 12:
+                    year += 1
+                    month -= 12
+                while month < 1:
+                    year -= 1
+                    month += 12
                 
-                # Algorithm from MariaDB source
-                days = 365 * year + (year - 1) // 4 - (year - 1) // 100 + (year - 1) // 400
+                # Handle day overflow for shorter months
+                max_day = calendar.monthrange(year, month)[1]
+                if day > max_day:
+                    day = max_day
                 
-                # Days for months
-                month_days = [0, 31, 59, 90, 120, 151, 181, 212, 243, 273, 304, 334]
-                days += month_days[month - 1]
+                date_obj = date_obj.replace(year=year, month=month, day=day)
+            elif unit in ['year', 'years']:
+                # Proper year addition
+                year = date_obj.year + int(amount)
+                date_obj = date_obj.replace(year=year)
+            elif unit in ['quarter', 'quarters']:
+                # Quarter is 3 months
+                year = date_obj.year
+                month = date_obj.month + (int(amount) * 3)
+                day = date_obj.day
                 
-                # Add leap day if needed
-                if month > 2 and year % 4 == 0 and (year % 100 != 0 or year % 400 == 0):
-                    days += 1
+                # Handle month overflow
+                while month > 12:
+                    year += 1
+                    month -= 12
+                while month < 1:
+                    year -= 1
+                    month += 12
                 
-                days += day
+                # Handle day overflow for shorter months
+                max_day = calendar.monthrange(year, month)[1]
+                if day > max_day:
+                    day = max_day
                 
-                return days
-            except Exception as e:
-                return None
-        
-        elif '$timestampAdd' in expression:
-            # Custom TIMESTAMPADD implementation
-            add_expr = expression['$timestampAdd']
-            unit = add_expr.get('unit', '').upper()
-            interval = add_expr.get('interval', 0)
-            date_expr = add_expr.get('date')
+                date_obj = date_obj.replace(year=year, month=month, day=day)
             
-            from datetime import datetime, timedelta
-            try:
-                # Evaluate the date expression
-                if isinstance(date_expr, dict):
-                    date_str = self._evaluate_expression(date_expr)
-                else:
-                    date_str = str(date_expr).strip("'\"")
-                
-                # Parse the date
-                date_obj = None
-                for fmt in ['%Y-%m-%d %H:%M:%S', '%Y-%m-%d', '%H:%M:%S']:
-                    try:
-                        date_obj = datetime.strptime(date_str, fmt)
-                        break
-                    except:
-                        continue
+            # Return appropriate format
+            if unit in ['hour', 'hours', 'minute', 'minutes', 'second', 'seconds', 'millisecond', 'milliseconds']:
+                return date_obj.strftime('%Y-%m-%d %H:%M:%S')
+            else:
+                return date_obj.strftime('%Y-%m-%d')
+        except Exception as e:
+            return None
+    
+    def _eval_date_subtract(self, sub_parts: Any) -> Any:
+        """Date subtract"""
+        try:
+            start_date = sub_parts.get('startDate')
+            unit = sub_parts.get('unit', 'day')
+            amount = sub_parts.get('amount', 0)
+            
+            # Recursively evaluate start date if it's an expression
+            if isinstance(start_date, dict):
+                start_date = self._evaluate_expression(start_date)
+            
+            # Parse start date
+            if isinstance(start_date, str):
+                date_obj = _parse_date(start_date, _DATE_FORMATS)
                 
                 if not date_obj:
                     return None
-                
-                # Add the interval based on unit
-                if unit in ['DAY', 'DAYS']:
-                    date_obj += timedelta(days=int(interval))
-                elif unit in ['HOUR', 'HOURS']:
-                    date_obj += timedelta(hours=int(interval))
-                elif unit in ['MINUTE', 'MINUTES']:
-                    date_obj += timedelta(minutes=int(interval))
-                elif unit in ['SECOND', 'SECONDS']:
-                    date_obj += timedelta(seconds=int(interval))
-                elif unit in ['WEEK', 'WEEKS']:
-                    date_obj += timedelta(weeks=int(interval))
-                elif unit in ['MONTH', 'MONTHS']:
-                    # Proper month addition
-                    year = date_obj.year
-                    month = date_obj.month + int(interval)
-                    day = date_obj.day
-                    
-                    while month > 12:
-                        year += 1
-                        month -= 12
-                    while month < 1:
-                        year -= 1
-                        month += 12
-                    
-                    import calendar
-                    max_day = calendar.monthrange(year, month)[1]
-                    if day > max_day:
-                        day = max_day
-                    
-                    date_obj = date_obj.replace(year=year, month=month, day=day)
-                elif unit in ['YEAR', 'YEARS']:
-                    year = date_obj.year + int(interval)
-                    date_obj = date_obj.replace(year=year)
-                elif unit in ['QUARTER', 'QUARTERS']:
-                    # Quarter is 3 months
-                    year = date_obj.year
-                    month = date_obj.month + (int(interval) * 3)
-                    day = date_obj.day
-                    
-                    while month > 12:
-                        year += 1
-                        month -= 12
-                    while month < 1:
-                        year -= 1
-                        month += 12
-                    
-                    import calendar
-                    max_day = calendar.monthrange(year, month)[1]
-                    if day > max_day:
-                        day = max_day
-                    
-                    date_obj = date_obj.replace(year=year, month=month, day=day)
-                
-                # Return in appropriate format
-                if len(date_str) == 10:  # Date only
-                    return date_obj.strftime('%Y-%m-%d')
-                else:
-                    return date_obj.strftime('%Y-%m-%d %H:%M:%S')
-                    
-            except Exception as e:
+            else:
                 return None
-        
-        elif '$addTime' in expression:
-            # Custom ADDTIME implementation
-            add_expr = expression['$addTime']
-            datetime_expr = add_expr.get('datetime')
-            time_str = add_expr.get('time', '')
             
-            from datetime import datetime, timedelta
-            try:
-                # Evaluate the datetime expression
-                if isinstance(datetime_expr, dict):
-                    datetime_str = self._evaluate_expression(datetime_expr)
-                else:
-                    datetime_str = str(datetime_expr).strip("'\"")
+            # Subtract based on unit  
+            if unit in ['day', 'days']:
+                date_obj -= timedelta(days=int(amount))
+            elif unit in ['hour', 'hours']:
+                date_obj -= timedelta(hours=int(amount))
+            elif unit in ['minute', 'minutes']:
+                date_obj -= timedelta(minutes=int(amount))
+            elif unit in ['second', 'seconds']:
+                date_obj -= timedelta(seconds=int(amount))
+            elif unit in ['millisecond', 'milliseconds']:
+                date_obj -= timedelta(milliseconds=int(amount))
+            elif unit in ['week', 'weeks']:
+                date_obj -= timedelta(weeks=int(amount))
+            elif unit in ['month', 'months']:
+                # Proper month subtraction
+                year = date_obj.year
+                month = date_obj.month - int(amount)
+                day = date_obj.day
                 
-                # Parse the datetime
-                datetime_obj = None
-                for fmt in ['%Y-%m-%d %H:%M:%S', '%Y-%m-%d', '%H:%M:%S']:
-                    try:
-                        datetime_obj = datetime.strptime(datetime_str, fmt)
-                        break
-                    except:
-                        continue
+                # Handle month underflow
+                while month < 1:
+                    year -= 1
+                    month += 12
+                while month > 12:
+                    year += 1
+                    month -= 12
                 
-                if not datetime_obj:
-                    return None
+                # Handle day overflow for shorter months
+                max_day = calendar.monthrange(year, month)[1]
+                if day > max_day:
+                    day = max_day
                 
-                # Parse the time to add
-                time_parts = time_str.split(':')
-                if len(time_parts) >= 3:
-                    hours = int(time_parts[0])
-                    minutes = int(time_parts[1])
-                    seconds = int(float(time_parts[2]))
-                    
-                    datetime_obj += timedelta(hours=hours, minutes=minutes, seconds=seconds)
-                    
-                    # Return in same format as input
-                    if len(datetime_str) > 10:  # Input was datetime
-                        return datetime_obj.strftime('%Y-%m-%d %H:%M:%S')
-                    else:  # Input was just time
-                        return datetime_obj.strftime('%H:%M:%S')
+                date_obj = date_obj.replace(year=year, month=month, day=day)
+            elif unit in ['year', 'years']:
+                # Proper year subtraction
+                year = date_obj.year - int(amount)
+                date_obj = date_obj.replace(year=year)
+            elif unit in ['quarter', 'quarters']:
+                # Quarter is 3 months
+                year = date_obj.year
+                month = date_obj.month - (int(amount) * 3)
+                day = date_obj.day
                 
-            except Exception as e:
+                # Handle month underflow
+                while month < 1:
+                    year -= 1
+                    month += 12
+                while month > 12:
+                    year += 1
+                    month -= 12
+                
+                # Handle day overflow for shorter months
+                max_day = calendar.monthrange(year, month)[1]
+                if day > max_day:
+                    day = max_day
+                
+                date_obj = date_obj.replace(year=year, month=month, day=day)
+            
+            # Return appropriate format
+            if unit in ['hour', 'hours', 'minute', 'minutes', 'second', 'seconds', 'millisecond', 'milliseconds']:
+                return date_obj.strftime('%Y-%m-%d %H:%M:%S')
+            else:
+                return date_obj.strftime('%Y-%m-%d')
+        except Exception as e:
+            return None
+    
+    def _eval_date_from_string(self, date_expr: Any) -> Any:
+        """Parse date from string"""
+        if isinstance(date_expr, dict):
+            date_string = date_expr.get('dateString', '')
+            # Simply return the date string as-is since it's already in the right format
+            return str(date_string).strip("'\"")
+        return None
+    
+    def _eval_year(self, date_expr: Any) -> Any:
+        """Extract year"""
+        try:
+            if isinstance(date_expr, str):
+                date_obj = datetime.strptime(date_expr, '%Y-%m-%d')
+                return date_obj.year
+            elif isinstance(date_expr, dict) and '$dateFromString' in date_expr:
+                date_string = date_expr['$dateFromString']['dateString']
+                date_obj = datetime.strptime(date_string, '%Y-%m-%d')
+                return date_obj.year
+        except _EVALUATION_ERRORS:
+            pass
+        return None
+    
+    def _eval_month(self, date_expr: Any) -> Any:
+        """Extract month"""
+        try:
+            if isinstance(date_expr, str):
+                date_obj = datetime.strptime(date_expr, '%Y-%m-%d')
+                return date_obj.month
+            elif isinstance(date_expr, dict) and '$dateFromString' in date_expr:
+                date_string = date_expr['$dateFromString']['dateString']
+                date_obj = datetime.strptime(date_string, '%Y-%m-%d')
+                return date_obj.month
+        except _EVALUATION_ERRORS:
+            pass
+        return None
+    
+    def _eval_to_days(self, date_expr: Any) -> Any:
+        """Custom TO_DAYS implementation"""
+        try:
+            if isinstance(date_expr, dict) and '$dateFromString' in date_expr:
+                date_string = date_expr['$dateFromString']['dateString']
+            else:
+                date_string = str(date_expr).strip("'\"")
+            
+            # Parse the date
+            date_obj = _parse_date(date_string, _DATE_FORMATS)
+            
+            if not date_obj:
                 return None
+            
+            # Calculate days since year 0000-01-01 (MariaDB epoch)
+            # This is the algorithm used by MariaDB
+            year = date_obj.year
+            month = date_obj.month
+            day = date_obj.day
+            
+            # MariaDB TO_DAYS calculation
+            if year < 1 or year > 9999:
+                return None
+            
+            # Algorithm from MariaDB source
+            days = 365 * year + (year - 1) // 4 - (year - 1) // 100 + (year - 1) // 400
+            
+            # Days for months
+            month_days = [0, 31, 59, 90, 120, 151, 181, 212, 243, 273, 304, 334]
+            days += month_days[month - 1]
+            
+            # Add leap day if needed
+            if month > 2 and year % 4 == 0 and (year % 100 != 0 or year % 400 == 0):
+                days += 1
+            
+            days += day
+            
+            return days
+        except Exception as e:
+            return None
+    
+    def _eval_timestamp_add(self, add_expr: Any) -> Any:
+        """Custom TIMESTAMPADD implementation"""
+        unit = add_expr.get('unit', '').upper()
+        interval = add_expr.get('interval', 0)
+        date_expr = add_expr.get('date')
         
-        elif '$subTime' in expression:
-            # Custom SUBTIME implementation
-            sub_expr = expression['$subTime']
-            datetime_expr = sub_expr.get('datetime')
-            time_str = sub_expr.get('time', '')
+        try:
+            # Evaluate the date expression
+            if isinstance(date_expr, dict):
+                date_str = self._evaluate_expression(date_expr)
+            else:
+                date_str = str(date_expr).strip("'\"")
             
-            from datetime import datetime, timedelta
-            try:
-                # Evaluate the datetime expression
-                if isinstance(datetime_expr, dict):
-                    datetime_str = self._evaluate_expression(datetime_expr)
-                else:
-                    datetime_str = str(datetime_expr).strip("'\"")
+            # Parse the date
+            date_obj = _parse_date(date_str, _DATE_FORMATS)
+            
+            if not date_obj:
+                return None
+            
+            # Add the interval based on unit
+            if unit in ['DAY', 'DAYS']:
+                date_obj += timedelta(days=int(interval))
+            elif unit in ['HOUR', 'HOURS']:
+                date_obj += timedelta(hours=int(interval))
+            elif unit in ['MINUTE', 'MINUTES']:
+                date_obj += timedelta(minutes=int(interval))
+            elif unit in ['SECOND', 'SECONDS']:
+                date_obj += timedelta(seconds=int(interval))
+            elif unit in ['WEEK', 'WEEKS']:
+                date_obj += timedelta(weeks=int(interval))
+            elif unit in ['MONTH', 'MONTHS']:
+                # Proper month addition
+                year = date_obj.year
+                month = date_obj.month + int(interval)
+                day = date_obj.day
                 
-                # Parse the datetime
-                datetime_obj = None
-                for fmt in ['%Y-%m-%d %H:%M:%S', '%Y-%m-%d', '%H:%M:%S']:
-                    try:
-                        datetime_obj = datetime.strptime(datetime_str, fmt)
-                        break
-                    except:
-                        continue
+                while month > 12:
+                    year += 1
+                    month -= 12
+                while month < 1:
+                    year -= 1
+                    month += 12
                 
-                if not datetime_obj:
-                    return None
+                max_day = calendar.monthrange(year, month)[1]
+                if day > max_day:
+                    day = max_day
                 
-                # Parse the time to subtract
-                time_parts = time_str.split(':')
-                if len(time_parts) >= 3:
-                    hours = int(time_parts[0])
-                    minutes = int(time_parts[1])
-                    seconds = int(float(time_parts[2]))
-                    
-                    datetime_obj -= timedelta(hours=hours, minutes=minutes, seconds=seconds)
-                    
-                    # Return in same format as input
-                    if len(datetime_str) > 10:  # Input was datetime
-                        return datetime_obj.strftime('%Y-%m-%d %H:%M:%S')
-                    else:  # Input was just time
-                        return datetime_obj.strftime('%H:%M:%S')
+                date_obj = date_obj.replace(year=year, month=month, day=day)
+            elif unit in ['YEAR', 'YEARS']:
+                year = date_obj.year + int(interval)
+                date_obj = date_obj.replace(year=year)
+            elif unit in ['QUARTER', 'QUARTERS']:
+                # Quarter is 3 months
+                year = date_obj.year
+                month = date_obj.month + (int(interval) * 3)
+                day = date_obj.day
                 
-            except Exception as e:
-                return None
-        
-        elif '$dayOfMonth' in expression:
-            # Extract day of month
-            date_expr = expression['$dayOfMonth']
-            from datetime import datetime
-            try:
-                if isinstance(date_expr, str):
-                    date_obj = datetime.strptime(date_expr, '%Y-%m-%d')
-                    return date_obj.day
-                elif isinstance(date_expr, dict) and '$dateFromString' in date_expr:
-                    date_string = date_expr['$dateFromString']['dateString']
-                    date_obj = datetime.strptime(date_string, '%Y-%m-%d')
-                    return date_obj.day
-            except:
-                pass
+                while month > 12:
+                    year += 1
+                    month -= 12
+                while month < 1:
+                    year -= 1
+                    month += 12
+                
+                max_day = calendar.monthrange(year, month)[1]
+                if day > max_day:
+                    day = max_day
+                
+                date_obj = date_obj.replace(year=year, month=month, day=day)
+            
+            # Return in appropriate format
+            if len(date_str) == 10:  # Date only
+                return date_obj.strftime('%Y-%m-%d')
+            else:
+                return date_obj.strftime('%Y-%m-%d %H:%M:%S')
+                
+        except Exception as e:
             return None
+    
+    def _eval_add_time(self, add_expr: Any) -> Any:
+        """Custom ADDTIME implementation"""
+        datetime_expr = add_expr.get('datetime')
+        time_str = add_expr.get('time', '')
         
-        elif '$eq' in expression:
-            # Equality comparison
-            values = expression['$eq']
-            if isinstance(values, list) and len(values) >= 2:
-                left, right = values[0], values[1]
+        try:
+            # Evaluate the datetime expression
+            if isinstance(datetime_expr, dict):
+                datetime_str = self._evaluate_expression(datetime_expr)
+            else:
+                datetime_str = str(datetime_expr).strip("'\"")
+            
+            # Parse the datetime
+            datetime_obj = _parse_date(datetime_str, _DATE_FORMATS)
+            
+            if not datetime_obj:
+                return None
+            
+            # Parse the time to add
+            time_parts = time_str.split(':')
+            if len(time_parts) >= 3:
+                hours = int(time_parts[0])
+                minutes = int(time_parts[1])
+                seconds = int(float(time_parts[2]))
                 
-                # Evaluate nested expressions
-                if isinstance(left, dict):
-                    left = self._evaluate_expression(left)
-                if isinstance(right, dict):
-                    right = self._evaluate_expression(right)
+                datetime_obj += timedelta(hours=hours, minutes=minutes, seconds=seconds)
                 
-                return left == right
-            return False
+                # Return in same format as input
+                if len(datetime_str) > 10:  # Input was datetime
+                    return datetime_obj.strftime('%Y-%m-%d %H:%M:%S')
+                else:  # Input was just time
+                    return datetime_obj.strftime('%H:%M:%S')
+            
+        except Exception as e:
+            return None
+    
+    def _eval_sub_time(self, sub_expr: Any) -> Any:
+        """Custom SUBTIME implementation"""
+        datetime_expr = sub_expr.get('datetime')
+        time_str = sub_expr.get('time', '')
         
-        elif '$ifNull' in expression:
-            # COALESCE functionality - return first non-null value
-            values = expression['$ifNull']
-            if isinstance(values, list) and len(values) >= 2:
-                first_value = values[0]
-                second_value = values[1]
+        try:
+            # Evaluate the datetime expression
+            if isinstance(datetime_expr, dict):
+                datetime_str = self._evaluate_expression(datetime_expr)
+            else:
+                datetime_str = str(datetime_expr).strip("'\"")
+            
+            # Parse the datetime
+            datetime_obj = _parse_date(datetime_str, _DATE_FORMATS)
+            
+            if not datetime_obj:
+                return None
+            
+            # Parse the time to subtract
+            time_parts = time_str.split(':')
+            if len(time_parts) >= 3:
+                hours = int(time_parts[0])
+                minutes = int(time_parts[1])
+                seconds = int(float(time_parts[2]))
                 
-                # Evaluate first value
-                if isinstance(first_value, dict):
-                    first_value = self._evaluate_expression(first_value)
+                datetime_obj -= timedelta(hours=hours, minutes=minutes, seconds=seconds)
                 
-                # If first value is None/null, return second value
-                if first_value is None:
-                    if isinstance(second_value, dict):
-                        return self._evaluate_expression(second_value)
-                    return second_value
-                else:
-                    return first_value
+                # Return in same format as input
+                if len(datetime_str) > 10:  # Input was datetime
+                    return datetime_obj.strftime('%Y-%m-%d %H:%M:%S')
+                else:  # Input was just time
+                    return datetime_obj.strftime('%H:%M:%S')
+            
+        except Exception as e:
             return None
-        
-        # Add more expression evaluations as needed
-        
-        # Default: return the expression as-is
-        return str(expression)
+    
+    def _eval_day_of_month(self, date_expr: Any) -> Any:
+        """Extract day of month"""
+        try:
+            if isinstance(date_expr, str):
+                date_obj = datetime.strptime(date_expr, '%Y-%m-%d')
+                return date_obj.day
+            elif isinstance(date_expr, dict) and '$dateFromString' in date_expr:
+                date_string = date_expr['$dateFromString']['dateString']
+                date_obj = datetime.strptime(date_string, '%Y-%m-%d')
+                return date_obj.day
+        except _EVALUATION_ERRORS:
+            pass
+        return None
+    
+    def _eval_eq(self, values: Any) -> Any:
+        """Equality comparison"""
+        if isinstance(values, list) and len(values) >= 2:
+            left, right = values[0], values[1]
+            
+            # Evaluate nested expressions
+            if isinstance(left, dict):
+                left = self._evaluate_expression(left)
+            if isinstance(right, dict):
+                right = self._evaluate_expression(right)
+            
+            return left == right
+        return False
+    
+    def _eval_if_null(self, values: Any) -> Any:
+        """COALESCE functionality - return first non-null value"""
+        if isinstance(values, list) and len(values) >= 2:
+            first_value = values[0]
+            second_value = values[1]
+            
+            # Evaluate first value
+            if isinstance(first_value, dict):
+                first_value = self._evaluate_expression(first_value)
+            
+            # If first value is None/null, return second value
+            if first_value is None:
+                if isinstance(second_value, dict):
+                    return self._evaluate_expression(second_value)
+                return second_value
+            else:
+                return first_value
+        return None
+
+
+@atexit.register
+def _close_shared_client():
+    """Close the shared MongoClient at interpreter exit"""
+    instance = MongoDBClient._instance
+    if instance is not None:
+        instance.close()
@@ -4,6 +4,7 @@ Handles: IF, CASE WHEN, COALESCE, NULLIF
 """
 from typing import Dict, List, Any, Optional
 from . import ConditionalParser, ConditionalTranslator
+from ...utils.helpers import field_reference
 
 class ConditionalFunctionMapper:
     """Maps SQL conditional functions to MongoDB aggregation operators"""
@@ -187,19 +188,22 @@ class ConditionalFunctionMapper:
                 (value.startswith('"') and value.endswith('"'))):
                 return value[1:-1]  # Remove quotes
             
-            # Check if it's a numeric literal
-            try:
-                if '.' in value:
-                    return float(value)
-                else:
-                    return int(value)
-            except ValueError:
-                pass
+            # Check if it's a numeric literal - only values that can start a number
+            # are parsed, so field names never go through a raised ValueError
+            first_char = value[:1]
+            if first_char.isdecimal() or (first_char and first_char in '+-.'):
+                try:
+                    if '.' in value:
+                        return float(value)
+                    else:
+                        return int(value)
+                except ValueError:
+                    pass
             
             # Check if it looks like a field reference (alphanumeric with optional dots/underscores)
             # vs a literal string value
             if self._is_likely_field_reference(value):
-                return f"${value}"
+                return field_reference(value)
             else:
                 # Treat as literal string value
                 return value
@@ -210,12 +214,13 @@ class ConditionalFunctionMapper:
         
         else:
             # Convert to string and treat as field reference
-            return f"${str(value)}"
+            return field_reference(str(value))
     
     def _is_likely_field_reference(self, value: str) -> bool:
         """Determine if a string value is likely a field reference vs a literal"""
         # If the value contains comparison operators, it's likely a condition expression
-        if any(op in value for op in ['>', '<', '=', '!=', '<>', '>=', '<=']):
+        # (every multi-character operator contains one of these three)
+        if '<' in value or '>' in value or '=' in value:
             return False
         
         # If it contains spaces and doesn't look like a simple field name, treat as literal
@@ -231,16 +236,16 @@ class ConditionalFunctionMapper:
         # - camelCase (userId, createdAt)  
         # - contain dots for nested fields (address.city)
         
-        # Check for common field patterns
-        has_underscore = '_' in value
-        has_dot = '.' in value
-        is_camelcase = (value[0].islower() and 
-                       any(c.isupper() for c in value[1:]) and
-                       value.replace('_', '').replace('.', '').isalnum())
-        is_lowercase_with_underscores = (value.islower() and 
-                                       value.replace('_', '').replace('.', '').isalnum())
+        # Underscores and dots decide it on their own - no need to scan any further
+        if '_' in value or '.' in value:
+            return True
         
-        return (has_underscore or has_dot or is_camelcase or is_lowercase_with_underscores)
+        # Otherwise only plain alphanumeric names qualify
+        if not value.isalnum():
+            return False
+        if value.islower():
+            return True
+        return value[0].islower() and any(c.isupper() for c in value[1:])
     
     def get_supported_functions(self) -> List[str]:
         """Get list of supported conditional function names"""
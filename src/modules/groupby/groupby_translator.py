@@ -5,6 +5,7 @@ Handles translation of GROUP BY operations to MongoDB aggregation pipelines
 
 from typing import Dict, Any, List
 from .groupby_types import GroupByStructure, AggregateFunction
+from ...utils.helpers import SORT_DIRECTIONS
 
 
 class GroupByTranslator:
@@ -90,13 +91,11 @@ class GroupByTranslator:
     
     def _build_sort_stage(self, orderby_info: List[Dict[str, Any]]) -> Dict[str, int]:
         """Build sort specification from ORDER BY info"""
-        sort_spec = {}
-        for order_item in orderby_info:
-            field = order_item.get('field')
-            direction = order_item.get('direction', 'ASC')
-            if field:
-                sort_spec[field] = 1 if direction.upper() == 'ASC' else -1
-        return sort_spec
+        return {
+            order_item['field']: SORT_DIRECTIONS.get(order_item.get('direction', 'ASC').upper(), -1)
+            for order_item in orderby_info
+            if order_item.get('field')
+        }
     
     def _extract_limit_count(self, limit_info: Any) -> int:
         """Extract limit count from limit info"""
@@ -152,8 +152,8 @@ class JoinTranslator:
                                 joins: List[JoinOperation]) -> Optional[Dict[str, Any]]:
         """Create projection for a specific column"""
         # Handle table.column format
-        if '.' in column:
-            table_part, col_part = column.split('.', 1)
+        table_part, dot, col_part = column.partition('.')
+        if dot:
             
             # Check if it's a joined table
             actual_table = table_map.get(table_part, table_part)
@@ -225,7 +225,7 @@ class JoinTranslator:
                 adjusted_filter[field] = adjusted_conditions
             elif '.' in field:
                 # Check if field has table prefix (e.g., c.customerName)
-                table_alias, column_name = field.split('.', 1)
+                table_alias, _, column_name = field.partition('.')
                 
                 # Find which table this refers to and map to correct field
                 mapped_field = None
@@ -88,42 +88,34 @@ class JSONParser:
     def _split_function_arguments(self, content: str) -> List[str]:
         """Split function arguments, handling nested parentheses and quotes"""
         args = []
-        current_arg = ""
         paren_level = 0
-        in_quotes = False
-        quote_char = None
+        arg_start = 0
         
         i = 0
-        while i < len(content):
+        length = len(content)
+        while i < length:
             char = content[i]
             
-            if char in ['"', "'"] and not in_quotes:
-                in_quotes = True
-                quote_char = char
-                current_arg += char
-            elif char == quote_char and in_quotes:
-                in_quotes = False
-                quote_char = None
-                current_arg += char
-            elif not in_quotes:
-                if char == '(':
-                    paren_level += 1
-                    current_arg += char
-                elif char == ')':
-                    paren_level -= 1
-                    current_arg += char
-                elif char == ',' and paren_level == 0:
-                    args.append(current_arg)
-                    current_arg = ""
-                else:
-                    current_arg += char
-            else:
-                current_arg += char
+            if char == '"' or char == "'":
+                # Jump over the quoted span - each argument is sliced out once at the end
+                close_idx = content.find(char, i + 1)
+                if close_idx == -1:
+                    break  # Unterminated string runs to the end
+                i = close_idx + 1
+                continue
+            
+            if char == '(':
+                paren_level += 1
+            elif char == ')':
+                paren_level -= 1
+            elif char == ',' and paren_level == 0:
+                args.append(content[arg_start:i])
+                arg_start = i + 1
             
             i += 1
         
-        if current_arg:
-            args.append(current_arg)
+        if arg_start < length:
+            args.append(content[arg_start:])
             
         return args
     
@@ -176,8 +176,7 @@ class JSONTranslator:
             }
         else:
             # Nested path with array access like $.items[0].name
-            base_path = mongodb_path.split('.')[0] if '.' in mongodb_path else mongodb_path
-            remaining_path = '.'.join(mongodb_path.split('.')[1:]) if '.' in mongodb_path else ''
+            base_path, _, remaining_path = mongodb_path.partition('.')
             
             array_elem = {"$arrayElemAt": [f"${field}.{base_path}", path.array_index]}
             
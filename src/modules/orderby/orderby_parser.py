@@ -107,11 +107,11 @@ class OrderByParser:
         field_name = field_name.strip('`"\'')
         
         # Remove table prefix if present (table.column -> column)
-        if '.' in field_name and not field_name.startswith('('):
-            # Only remove prefix if it's not a function call
-            parts = field_name.split('.')
-            if len(parts) == 2:
-                field_name = parts[1]
+        table_part, dot, column_part = field_name.partition('.')
+        if dot and not field_name.startswith('('):
+            # Only remove prefix if it's not a function call (and there's exactly one dot)
+            if '.' not in column_part:
+                field_name = column_part
         
         return field_name
     
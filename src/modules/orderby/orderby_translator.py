@@ -24,15 +24,13 @@ class OrderByTranslator:
         if order_by.is_empty():
             return {}
         
-        sort_spec = {}
-        
-        for field in order_by.fields:
-            # Map field name if needed
-            mongo_field = self._map_field_name(field.field, collection_schema)
-            
-            # Convert direction to MongoDB sort value
-            sort_value = 1 if field.direction == SortDirection.ASC else -1
-            sort_spec[mongo_field] = sort_value
+        # Map each field name and convert its direction to a MongoDB sort value,
+        # building the spec from the pairs in one go
+        sort_spec = dict(
+            (self._map_field_name(field.field, collection_schema),
+             1 if field.direction == SortDirection.ASC else -1)
+            for field in order_by.fields
+        )
         
         return {"$sort": sort_spec}
     
@@ -11,6 +11,13 @@ class SubqueryTranslator:
     def __init__(self):
         self.parser = SubqueryParser()
         self.debug = False
+        self.subquery_handlers = {
+            SubqueryType.SCALAR: self._translate_scalar_subquery,
+            SubqueryType.IN_LIST: self._translate_in_subquery,
+            SubqueryType.EXISTS: self._translate_exists_subquery,
+            SubqueryType.ROW: self._translate_row_subquery,
+            SubqueryType.DERIVED: self._translate_derived_subquery
+        }
     
     def translate_subqueries_to_pipeline(self, subqueries: List[SubqueryOperation], 
                                        base_collection: str) -> List[Dict[str, Any]]:
@@ -21,21 +28,13 @@ class SubqueryTranslator:
         pipeline = []
         
         for subquery_op in subqueries:
-            if subquery_op.subquery_type == SubqueryType.SCALAR:
-                stages = self._translate_scalar_subquery(subquery_op, base_collection)
-            elif subquery_op.subquery_type == SubqueryType.IN_LIST:
-                stages = self._translate_in_subquery(subquery_op, base_collection)
-            elif subquery_op.subquery_type == SubqueryType.EXISTS:
-                stages = self._translate_exists_subquery(subquery_op, base_collection)
-            elif subquery_op.subquery_type == SubqueryType.ROW:
-                stages = self._translate_row_subquery(subquery_op, base_collection)
-            elif subquery_op.subquery_type == SubqueryType.DERIVED:
-                stages = self._translate_derived_subquery(subquery_op, base_collection)
-            else:
+            handler = self.subquery_handlers.get(subquery_op.subquery_type)
+            if not handler:
                 if self.debug:
                     print(f"Unsupported subquery type: {subquery_op.subquery_type}")
                 continue
-                
+            
+            stages = handler(subquery_op, base_collection)
             pipeline.extend(stages)
         
         return pipeline
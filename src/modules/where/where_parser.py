@@ -9,7 +9,8 @@ class WhereCondition:
     """Represents a single WHERE condition"""
     def __init__(self, field: str, operator: str, value: Any):
         self.field = field
-        self.operator = operator
+        # Normalize once so translators can match operators without .upper()
+        self.operator = operator.upper()
         self.value = value
     
     def to_dict(self) -> Dict[str, Any]:
@@ -142,7 +143,7 @@ class WhereParser:
                 
                 # Operator
                 elif token.ttype in [T.Operator.Comparison] or str(token).strip().upper() in ['LIKE', 'IN', 'BETWEEN']:
-                    operator = str(token).strip().upper()
+                    operator = str(token).strip()
                 
                 # Value (string literal, number, etc.)
                 elif token.ttype in [T.Literal.String.Single, 
@@ -2,8 +2,21 @@
 Utility functions for the MongoSQL translator
 """
 import re
+from functools import lru_cache
 from typing import Any, Dict, List, Optional, Union
 
+# Translation tables for building MongoDB regex patterns
+REGEX_SPECIAL_CHARS = '.^$*+?()[]{}|\\'
+REGEX_ESCAPE_TABLE = str.maketrans({char: '\\' + char for char in REGEX_SPECIAL_CHARS})
+LIKE_REGEX_TABLE = {
+    **REGEX_ESCAPE_TABLE,
+    ord('%'): '.*',  # % matches any sequence of characters
+    ord('_'): '.'    # _ matches any single character
+}
+
+# MongoDB sort value for each SQL ORDER BY direction
+SORT_DIRECTIONS = {'ASC': 1, 'DESC': -1, 'asc': 1, 'desc': -1}
+
 def format_mongodb_query(query: Dict[str, Any]) -> str:
     """Format MongoDB query for display"""
     operation = query.get('operation', 'unknown')
@@ -127,27 +140,19 @@ def is_valid_mongodb_name(name: str) -> bool:
 
 def escape_regex_chars(text: str) -> str:
     """Escape special regex characters for MongoDB regex queries"""
-    # Escape special regex characters except for % and _ which are SQL wildcards
-    special_chars = ['.', '^', '$', '*', '+', '?', '(', ')', '[', ']', '{', '}', '|', '\\']
-    
-    for char in special_chars:
-        text = text.replace(char, '\\' + char)
-    
-    return text
+    # % and _ are SQL wildcards and are left untouched
+    return text.translate(REGEX_ESCAPE_TABLE)
 
+@lru_cache(maxsize=2048)
 def sql_like_to_regex(pattern: str) -> str:
     """Convert SQL LIKE pattern to MongoDB regex pattern"""
-    # Escape special regex characters first
-    escaped = escape_regex_chars(pattern)
-    
-    # Convert SQL wildcards to regex
-    # % matches any sequence of characters
-    escaped = escaped.replace('%', '.*')
-    
-    # _ matches any single character
-    escaped = escaped.replace('_', '.')
-    
-    return escaped
+    # Escape regex characters and convert SQL wildcards in a single pass
+    return pattern.translate(LIKE_REGEX_TABLE)
+
+@lru_cache(maxsize=4096)
+def field_reference(field_name: str) -> str:
+    """Build a MongoDB field reference ($field), sharing one string per field name"""
+    return '$' + field_name
 
 def parse_sql_value(value: str) -> Any:
     """Parse SQL value string to appropriate Python type"""
@@ -215,10 +220,10 @@ def build_aggregation_pipeline(select_parts: Dict[str, Any]) -> List[Dict[str, A
     
     # Add $sort stage for ORDER BY
     if select_parts.get('order_by'):
-        sort_dict = {}
-        for order_item in select_parts['order_by']:
-            direction = 1 if order_item['direction'] == 'ASC' else -1
-            sort_dict[order_item['field']] = direction
+        sort_dict = dict(
+            (order_item['field'], SORT_DIRECTIONS.get(order_item['direction'], -1))
+            for order_item in select_parts['order_by']
+        )
         
         pipeline.append({'$sort': sort_dict})
     